@@ -2,3 +2,4 @@
 
 from app.api.base import APIClient
 from app.api.client import LocationDataAPIClient
+from app.api.exceptions import CursorRejectedError
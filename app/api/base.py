@@ -3,12 +3,23 @@
 from typing import List
 from abc import ABC, abstractmethod
 
-from app.api.response import LocationDataResponse
+from app.api.response import LocationDataResponse, LocationDataChangesResponse
+from app.utils.latency import LatencyStats
 
 
 class APIClient(ABC):
     """This base class abstracts location data API client methods"""
 
+    @property
+    def latency(self) -> LatencyStats | None:
+        """Latency percentiles of the last location data fetches, if client records them"""
+
+        return None
+
     @abstractmethod
     async def get(self) -> List[LocationDataResponse]:
         pass
+
+    @abstractmethod
+    async def get_changes(self, cursor: str | None) -> LocationDataChangesResponse:
+        pass
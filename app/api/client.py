@@ -1,48 +1,196 @@
 """This module contains LocationDataAPIClient class"""
 
-from typing import List, Any
+import asyncio
+import time
+
+from http import HTTPStatus
+from typing import List, Any, Mapping, Sequence
 
 import aiohttp
 
 from app.api.base import APIClient
-from app.api.response import LocationDataResponse
+from app.api.exceptions import CursorRejectedError
+from app.api.response import LocationDataResponse, LocationDataChangesResponse
+from app.utils.latency import LatencyRecorder, LatencyStats
 
 
 class LocationDataAPIClient(APIClient):
-    """This class contains Location Data API client functionality"""
+    """
+    This class contains Location Data API client functionality.
+
+    Every request is limited by connect, first byte (response headers) and total timeouts,
+    so that stalled upstream connection fails synchronization instead of hanging it.
+    Location data may be served by mirror endpoints: if request is not finished within
+    hedge delay, the same request is sent to the next mirror, the first successful response
+    is taken and the other requests are cancelled. Without hedge delay mirrors are used
+    on failure only.
+    """
 
-    def __init__(self, url: str, login: str, password: str):
+    def __init__(
+            self,
+            url: str,
+            login: str,
+            password: str,
+            changes_url: str | None = None,
+            mirror_urls: Sequence[str] = (),
+            connect_timeout: float | None = None,
+            first_byte_timeout: float | None = None,
+            total_timeout: float | None = None,
+            hedge_after: float | None = None,
+    ):
         """
         Construct.
 
         :param url: Location data API endpoint URL
         :param login: Basic auth login
         :param password: Basic auth password
+        :param changes_url: Optional location data changes API endpoint URL
+        :param mirror_urls: Location data API mirror endpoints URLs
+        :param connect_timeout: Optional connection timeout in seconds
+        :param first_byte_timeout: Optional timeout of response headers in seconds
+        :param total_timeout: Optional timeout of the whole request in seconds
+        :param hedge_after: Optional delay in seconds, after which hedged request is sent to mirror
         """
 
         self._url = url
+        self._changes_url = changes_url
+        self._mirror_urls = tuple(mirror_urls)
+        self._first_byte_timeout = first_byte_timeout
+        self._hedge_after = hedge_after
+        self._timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+        self._latency = LatencyRecorder()
         self.__auth = aiohttp.BasicAuth(login=login, password=password)
 
-    async def _get(self, url: str, session: aiohttp.ClientSession) -> Any:
+    @property
+    def latency(self) -> LatencyStats | None:
+        """Latency percentiles of the last location data fetches & failed requests"""
+
+        return self._latency.stats()
+
+    async def _get(self, url: str, session: aiohttp.ClientSession, params: Mapping[str, str] | None = None) -> Any:
         """
         Make GET request to provided URL within provided session.
         Includes BasicAuth authentication by default.
 
         :param url: Request URL
         :param session: `ClientSession` instance
+        :param params: Optional query parameters
         :return: JSON-parsed response
+        :raises asyncio.TimeoutError: If response headers are not received within first byte timeout
         """
 
-        async with session.get(url=url, auth=self.__auth) as response:
+        request = session.get(url=url, auth=self.__auth, params=params)
+
+        async with await asyncio.wait_for(request, timeout=self._first_byte_timeout) as response:
             return await response.json()
 
+    async def _get_hedged(self, session: aiohttp.ClientSession) -> Any:
+        """
+        Request location data from endpoint & its mirrors, sending the next request
+        after hedge delay or on failure of all sent ones. Returns the first successful response
+        and cancels the other requests.
+
+        :param session: `ClientSession` instance
+        :return: JSON-parsed response
+        :raises Exception: The first request error, if all requests failed
+        """
+
+        urls = iter((self._url, *self._mirror_urls))
+        remaining = len(self._mirror_urls) + 1
+        pending = {}
+        errors = []
+        started = time.monotonic()
+
+        def send() -> bool:
+            nonlocal remaining
+
+            url = next(urls, None)
+
+            if url is None:
+                return False
+
+            remaining -= 1
+            pending[asyncio.ensure_future(self._get(url=url, session=session))] = (url, time.monotonic())
+            return True
+
+        send()
+
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self._hedge_after if remaining else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                if not done:
+                    send()
+                    continue
+
+                for task in done:
+                    url, sent = pending.pop(task)
+
+                    if task.exception() is None:
+                        self._latency.record(time.monotonic() - started, source=url)
+                        return task.result()
+
+                    # Failed attempts, e.g. timed out ones, are recorded too, so that percentiles
+                    # are not biased toward successful fetches
+                    self._latency.record(time.monotonic() - sent, source=url)
+                    errors.append(task.exception())
+
+                if not pending:
+                    send()
+        finally:
+            for task in pending:
+                task.cancel()
+
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        raise errors[0]
+
     async def get(self) -> List[LocationDataResponse]:
         """
-        Fetch location data API and return parsed response.
+        Fetch location data API and its mirrors and return parsed response.
 
         :return: List of `LocationDataResponse` instances
         """
 
-        async with aiohttp.ClientSession(raise_for_status=True) as session:
-            location_data = await self._get(url=self._url, session=session)
+        async with aiohttp.ClientSession(raise_for_status=True, timeout=self._timeout) as session:
+            location_data = await self._get_hedged(session=session)
             return [LocationDataResponse(**data) for data in location_data]
+
+    async def get_changes(self, cursor: str | None) -> LocationDataChangesResponse:
+        """
+        Fetch location data changes API and return parsed response.
+        Without cursor, API is expected to return its current cursor only.
+
+        Changes endpoint response format is
+        ``{"added": [...], "removed": [...], "cursor": "..."}``.
+        API signals that cursor is no longer served with ``410 Gone`` status.
+        Changes are requested from primary endpoint only, since mirrors may serve other cursors.
+
+        :param cursor: Cursor, returned by previous call, or None
+        :return: `LocationDataChangesResponse` instance
+        :raises CursorRejectedError: If API rejected provided cursor
+        :raises RuntimeError: If changes endpoint URL is not configured
+        """
+
+        if self._changes_url is None:
+            raise RuntimeError("Location data changes endpoint URL is not configured")
+
+        params = {"since": cursor} if cursor is not None else None
+
+        async with aiohttp.ClientSession(raise_for_status=True, timeout=self._timeout) as session:
+            try:
+                changes = await self._get(url=self._changes_url, session=session, params=params)
+            except aiohttp.ClientResponseError as error:
+                if error.status == HTTPStatus.GONE:
+                    raise CursorRejectedError(cursor) from error
+                raise
+
+        return LocationDataChangesResponse(
+            added=[LocationDataResponse(**data) for data in changes["added"]],
+            removed=[LocationDataResponse(**data) for data in changes["removed"]],
+            cursor=changes["cursor"],
+        )
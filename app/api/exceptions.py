@@ -0,0 +1,8 @@
+"""This module contains location data API exceptions"""
+
+
+class CursorRejectedError(Exception):
+    """
+    Raised when location data API refuses to serve changes since provided cursor,
+    e.g. because its change log has been truncated. Full reconciliation is required.
+    """
@@ -1,6 +1,6 @@
 """This module contains API responses types"""
 
-from typing import NamedTuple
+from typing import NamedTuple, List
 
 
 class LocationDataResponse(NamedTuple):
@@ -9,3 +9,11 @@ class LocationDataResponse(NamedTuple):
     lac: int
     cellid: int
     eci: int
+
+
+class LocationDataChangesResponse(NamedTuple):
+    """Location data changes endpoint response type"""
+
+    added: List[LocationDataResponse]
+    removed: List[LocationDataResponse]
+    cursor: str
@@ -1,10 +1,9 @@
 """This module provides configurations"""
 
 from functools import lru_cache
+from typing import List, Literal
 
-from sqlalchemy.engine import URL
-
-from pydantic import HttpUrl, SecretStr
+from pydantic import HttpUrl, SecretStr, model_validator
 from pydantic_settings import BaseSettings, DotEnvSettingsSource
 
 
@@ -16,14 +15,88 @@ class AppConfiguration(BaseSettings):
     AUTH_PASSWORD: SecretStr
     SCHEDULE: str
 
+    LOCATION_DATA_CHANGES_ENDPOINT_URL: HttpUrl | None = None
+    RECONCILIATION_SCHEDULE: str | None = None
+    RECONCILIATION_STRATEGY: Literal["full", "checksum", "snapshot"] = "full"
+    RECONCILIATION_BUCKETS: int = 1024
+    SNAPSHOT_PATH: str = "location_data.snapshot"
+
+    API_MIRROR_URLS: List[HttpUrl] = []
+    API_CONNECT_TIMEOUT: float | None = 10.0
+    API_FIRST_BYTE_TIMEOUT: float | None = 120.0
+    API_TOTAL_TIMEOUT: float | None = 300.0
+    API_HEDGE_AFTER: float | None = None
+
     POSTGRES_USER: str
     POSTGRES_DB: str
     POSTGRES_PASSWORD: str
     POSTGRES_HOST: str
     POSTGRES_PORT: int
+    POSTGRES_REPLICA_HOST: str | None = None
+    POSTGRES_REPLICA_PORT: int | None = None
+    POSTGRES_REPLICA_STANDIN: bool = False
+
+    DB_WRITE_CHUNK_SIZE: int | None = None
+    DB_WRITE_ROWS_PER_SECOND: float | None = None
+    DB_WRITE_WAL_BYTES_PER_SECOND: float | None = None
+    DB_MAX_REPLICATION_LAG: float | None = None
+    DB_WRITE_MODE: Literal["rows", "ids", "count"] = "rows"
+    DB_BATCH_TARGET_DURATION: float | None = None
+    DB_BATCH_MIN_SIZE: int = 1_000
+    DB_BATCH_MAX_SIZE: int = 100_000
+    DB_REBUILD_RATIO: float | None = None
+
+    SYNC_JOURNAL_PATH: str | None = None
+    SYNC_CHECKPOINT_SIZE: int = 10_000
+
+    COORDINATION_MODE: Literal["none", "leader", "sharded"] = "none"
+    COORDINATION_SHARDS: int = 64
+    COORDINATION_LEASE: float = 60.0
+
+    MEMORY_BUDGET: int | None = None
+    MEMORY_TRACING: bool = False
+
+    PROFILE_DIR: str = "profiles"
+    PROFILE_CYCLES: int = 1
+    PROFILE_FLAG_FILE: str = "profile.flag"
+
+    @model_validator(mode="after")
+    def check_write_mode(self) -> "AppConfiguration":
+        """Snapshot strategy rewrites snapshot from written rows, so they must be returned"""
+
+        if self.RECONCILIATION_STRATEGY == "snapshot" and self.DB_WRITE_MODE != "rows":
+            raise ValueError("Snapshot reconciliation strategy requires rows write mode")
+
+        return self
+
+    @model_validator(mode="after")
+    def check_sharded_mode(self) -> "AppConfiguration":
+        """
+        Sharded mode synchronizes claimed shards by full comparison only, so modes,
+        it would silently bypass, must not be configured together with it
+        """
+
+        if self.COORDINATION_MODE != "sharded":
+            return self
+
+        bypassed = {
+            "LOCATION_DATA_CHANGES_ENDPOINT_URL": self.LOCATION_DATA_CHANGES_ENDPOINT_URL is not None,
+            "RECONCILIATION_STRATEGY": self.RECONCILIATION_STRATEGY != "full",
+            "SYNC_JOURNAL_PATH": self.SYNC_JOURNAL_PATH is not None,
+            "DB_REBUILD_RATIO": self.DB_REBUILD_RATIO is not None,
+            "MEMORY_BUDGET": self.MEMORY_BUDGET is not None,
+        }
+        names = [name for name, configured in bypassed.items() if configured]
+
+        if names:
+            raise ValueError(f"Sharded coordination mode does not support {', '.join(names)}")
+
+        return self
 
     @property
     def engine_url(self):
+        from sqlalchemy.engine import URL
+
         return URL.create(
             drivername="postgresql+asyncpg",
             username=self.POSTGRES_USER,
@@ -34,6 +107,25 @@ class AppConfiguration(BaseSettings):
             query={},
         )
 
+    @property
+    def replica_engine_url(self):
+        """Engine URL of replica, location data is read from, or None, if replica is not configured"""
+
+        from sqlalchemy.engine import URL
+
+        if self.POSTGRES_REPLICA_HOST is None:
+            return None
+
+        return URL.create(
+            drivername="postgresql+asyncpg",
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD,
+            host=self.POSTGRES_REPLICA_HOST,
+            port=self.POSTGRES_REPLICA_PORT or self.POSTGRES_PORT,
+            database=self.POSTGRES_DB,
+            query={},
+        )
+
 
 @lru_cache
 def get_app_configuration(path: str) -> AppConfiguration:
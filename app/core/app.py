@@ -1,15 +1,33 @@
 """This module contains LocationDataSynchronizerApp class"""
 
-import asyncio
+from __future__ import annotations
 
-from typing import List, Tuple
+import asyncio
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from typing import List, Tuple, TYPE_CHECKING
 
+from app.api import CursorRejectedError
+from app.core.batch import LocationDataBatch, WriteSummary
 from app.core.models import LocationData
-from app.services.db import DBService
-from app.services.api import APIService
+from app.core.events import EventManager
+from app.core.journal import SyncJournal, SyncPlan
+from app.core.reconciliation import (
+    ReconciliationStrategy,
+    FullReconciliation,
+    sync_location_data,
+    diff_batches,
+    key_range_bounds,
+)
+from app.utils.memory import MemoryMonitor, MemoryBudget, MemoryStage
+from app.utils.profiling import CycleProfiler
+from app.utils.snapshot import snapshot_checksum
+
+if TYPE_CHECKING:
+    from app.services.db import DBService, CoordinationDBService
+    from app.services.api import APIService
 
 
 class LocationDataSynchronizerApp:
@@ -18,53 +36,477 @@ class LocationDataSynchronizerApp:
     It uses APIService & DBService to interact with API & database.
     Contains main loop, that triggers synchronization method periodically,
     according to provided schedule.
+
+    Actual & existing location data are compared using provided `ReconciliationStrategy`.
+    In incremental mode each run applies changes since stored cursor only,
+    while full snapshot synchronization runs on reconciliation schedule
+    or when cursor is missing or rejected by API.
+
+    Memory usage of synchronization stages is measured by optional `MemoryMonitor`.
+    If projected working set of full synchronization exceeds optional `MemoryBudget`,
+    location data is compared & written by key ranges instead of at once.
+    Synchronization cycles & their stages are profiled on demand by optional `CycleProfiler`.
+
+    Replicas, sharing one database, are coordinated by optional `CoordinationDBService`:
+    either only the leader replica synchronizes location data, or every replica synchronizes
+    location data of claimed shards with full comparison, bypassing strategy & change feed.
+
+    If optional `SyncJournal` is provided, full synchronization is resumable: changes are
+    journaled as sync plan before writing and committed in checkpoints, and the next run
+    continues interrupted plan, if actual location data has not changed since.
+    Chunked full synchronization is not journaled, since it commits every key range anyway.
+
+    If optional rebuild ratio is set and full synchronization changes larger share of location_data
+    table, than the ratio, the table is rebuilt & swapped by DBService instead of writing changes row by row.
+
+    If DBService writes in ids or count mode, written rows are not returned,
+    so reconciliation strategy is not notified about committed changes.
     """
 
-    def __init__(self, api_service: APIService[LocationData], db_service: DBService[LocationData]):
+    def __init__(
+            self,
+            api_service: APIService[LocationData],
+            db_service: DBService[LocationData],
+            strategy: ReconciliationStrategy | None = None,
+            incremental: bool = False,
+            memory_monitor: MemoryMonitor | None = None,
+            memory_budget: MemoryBudget | None = None,
+            profiler: CycleProfiler | None = None,
+            coordinator: CoordinationDBService | None = None,
+            journal: SyncJournal | None = None,
+            rebuild_ratio: float | None = None,
+    ):
         """
         Construct.
 
         :param api_service: `APIService` instance
         :param db_service: `DBService` instance
+        :param strategy: `ReconciliationStrategy` instance. Defaults to `FullReconciliation`
+        :param incremental: Whether to synchronize using API change feed
+        :param memory_monitor: Optional `MemoryMonitor` instance, measuring synchronization stages
+        :param memory_budget: Optional `MemoryBudget` instance, enabling chunked full synchronization
+        :param profiler: Optional `CycleProfiler` instance
+        :param coordinator: Optional `CoordinationDBService` instance
+        :param journal: Optional `SyncJournal` instance, enabling resumable full synchronization
+        :param rebuild_ratio: Optional ratio of changed records to estimated location_data rows count,
+        above which location_data table is rebuilt
         """
 
         self._api_service = api_service
         self._db_service = db_service
+        self._strategy = strategy or FullReconciliation()
+        self._incremental = incremental
+        self._memory_monitor = memory_monitor
+        self._memory_budget = memory_budget
+        self._profiler = profiler
+        self._coordinator = coordinator
+        self._journal = journal
+        self._rebuild_ratio = rebuild_ratio
+        self._feed_size: int | None = None
 
-        self._scheduler = AsyncIOScheduler()
+        self._lock = asyncio.Lock()
 
-    async def run_scheduled(self, crontab: str = "* * * * *"):
+    async def run_scheduled(self, crontab: str = "* * * * *", reconciliation_crontab: str | None = None):
         """
         Configure scheduler due to provided crontab and run scheduler task.
-        Target method is `sync_once`.
+        APScheduler is imported here, so that one-shot runs do not import it.
+        Target method is `sync_once`. In incremental mode `reconcile` method is
+        additionally scheduled due to reconciliation crontab, if provided.
 
         :param crontab: Crontab string. Defaults to <At every minute>
+        :param reconciliation_crontab: Optional full reconciliation crontab string
         """
 
-        self._scheduler.add_job(self.sync_once, trigger=CronTrigger.from_crontab(crontab))
-        self._scheduler.start()
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        from apscheduler.triggers.cron import CronTrigger
+
+        scheduler = AsyncIOScheduler()
+        scheduler.add_job(self.sync_once, trigger=CronTrigger.from_crontab(crontab))
+
+        if self._incremental and reconciliation_crontab is not None:
+            scheduler.add_job(self.reconcile, trigger=CronTrigger.from_crontab(reconciliation_crontab))
+
+        scheduler.start()
 
         while True:
             await asyncio.sleep(1)
 
     async def sync_once(self):
         """
-        Requests actual location data from APIService & existing location data from DBService.
-        Synchronizes actual & existing location data using `sync_location_data` method.
-        Updates location data in database using DBService `sync_db` method.
+        Synchronizes location data once.
+        In incremental mode applies changes since stored cursor, falling back
+        to full synchronization, if there is no cursor or API rejects it.
+        Otherwise, runs full synchronization.
         """
 
-        api_location_data, db_location_data = await asyncio.gather(
-            self._api_service.get(),
-            self._db_service.get(),
-        )
+        async with self._lock:
+            with self._cycle():
+                try:
+                    await self._sync_once()
+                finally:
+                    await self._report_memory()
+
+    async def reconcile(self):
+        """Runs full synchronization regardless of synchronization mode"""
+
+        async with self._lock:
+            with self._cycle():
+                try:
+                    await self._sync_once(full=True)
+                finally:
+                    await self._report_memory()
+
+    async def shutdown(self):
+        """Releases coordination locks, so that other replicas take over immediately"""
+
+        if self._coordinator is not None:
+            await self._coordinator.release()
+
+    def arm_profiler(self, cycles: int | None = None):
+        """
+        Arms profiling of the next synchronization cycles, e.g. on signal.
+        Does nothing, if app has no profiler.
+
+        :param cycles: Optional number of cycles to be profiled
+        """
+
+        if self._profiler is not None:
+            self._profiler.arm(cycles)
+
+    async def _sync_once(self, full: bool = False):
+        """
+        Chooses synchronization mode & synchronizes location data once.
+        In leader mode does nothing, unless this replica is the leader.
+
+        :param full: Whether to run full synchronization regardless of synchronization mode
+        """
+
+        if self._coordinator is not None and self._coordinator.sharded:
+            await self._sync_shards()
+            return
+
+        if self._coordinator is not None and not await self._coordinator.acquire_leadership():
+            return
+
+        if full or not self._incremental:
+            await self._sync_full()
+            return
+
+        cursor = await self._db_service.get_cursor()
+
+        if cursor is None:
+            await self._sync_full()
+            return
+
+        try:
+            await self._sync_changes(cursor)
+        except CursorRejectedError:
+            await self._sync_full()
+
+    async def _verify_coordination(self):
+        """Checks that coordination locks are still held before writing, if replicas are coordinated"""
 
-        to_insert, to_delete = self.sync_location_data(
-            actual_data=api_location_data,
-            existing_data=db_location_data,
+        if self._coordinator is not None:
+            await self._coordinator.verify()
+
+    @EventManager.event("sync_memory")
+    async def _report_memory(self) -> List[MemoryStage]:
+        """
+        Reports memory usage of stages of finished synchronization cycle
+        & resets memory monitor for the next one.
+
+        :return: List of `MemoryStage` instances. Empty, if memory is not monitored
+        """
+
+        if self._memory_monitor is None:
+            return []
+
+        stages = self._memory_monitor.stages
+        self._memory_monitor.reset()
+
+        return stages
+
+    def _cycle(self):
+        """
+        Profiles synchronization cycle, if profiler is armed.
+
+        :return: Context manager
+        """
+
+        if self._profiler is None:
+            return nullcontext()
+
+        return self._profiler.cycle()
+
+    @contextmanager
+    def _stage(self, name: str):
+        """
+        Measures memory usage of synchronization stage, if memory is monitored,
+        and marks stage in cycle profile, if cycle is being profiled.
+
+        :param name: Stage name
+        """
+
+        memory_stage = nullcontext() if self._memory_monitor is None else self._memory_monitor.stage(name)
+        profiler_stage = (
+            self._profiler.stage(name) if self._profiler is not None and self._profiler.active else nullcontext()
         )
 
-        _inserted, _deleted = await self._db_service.sync_db(to_insert, to_delete)
+        with memory_stage, profiler_stage:
+            yield
+
+    async def _sync_changes(self, cursor: str):
+        """
+        Requests location data changes since provided cursor from APIService &
+        applies them using DBService `sync_db` method, storing new cursor.
+
+        :param cursor: Stored change feed cursor
+        """
+
+        with self._stage("fetch"):
+            added, removed, new_cursor = await self._api_service.get_changes(cursor)
+
+        await self._verify_coordination()
+
+        with self._stage("write"):
+            written = await self._db_service.sync_db(added, removed, cursor=new_cursor)
+
+        with self._stage("commit"):
+            if not isinstance(written, WriteSummary):
+                inserted, deleted = written
+                await self._strategy.committed(
+                    LocationDataBatch.from_models(inserted),
+                    LocationDataBatch.from_models(deleted),
+                )
+
+    async def _sync_full(self):
+        """
+        Calculates location data to be inserted & deleted using reconciliation strategy.
+        Updates location data in database using DBService `sync_db_batch` method.
+
+        In incremental mode, current API cursor is requested before the snapshot,
+        so changes made during synchronization are applied by the next incremental run.
+
+        If memory budget is set, working set is projected from the last feed size & estimated
+        location_data rows count, and synchronization is chunked, if it does not fit the budget.
+        """
+
+        cursor = None
+
+        if self._incremental:
+            _added, _removed, cursor = await self._api_service.get_changes(None)
+
+        existing_size = 0
+        partitions = 1
+
+        if self._memory_budget is not None:
+            existing_size = await self._db_service.get_count_estimate()
+            feed_size = existing_size if self._feed_size is None else self._feed_size
+            partitions = self._memory_budget.partitions(feed_size + existing_size)
+
+        if partitions > 1:
+            await self._sync_full_chunked(partitions, cursor)
+            return
+
+        checkpoint = None
+        resumed = False
+
+        with self._stage("diff"):
+            if self._journal is None:
+                to_insert, to_delete = await self._strategy.diff(self._api_service, self._db_service)
+            else:
+                plan = await self._plan()
+                to_insert, to_delete, checkpoint, resumed = plan.to_insert, plan.to_delete, plan.plan_id, plan.resumed
+
+        # Resumed plan may be partially applied, while rebuild is atomic & needs no journal
+        rebuild = not resumed and await self._rebuilds(len(to_insert) + len(to_delete), existing_size)
+
+        if rebuild and checkpoint is not None:
+            self._journal.discard()
+            checkpoint = None
+
+        await self._verify_coordination()
+
+        with self._stage("write"):
+            if rebuild:
+                written = await self._db_service.rebuild_db_batch(to_insert, to_delete, cursor=cursor)
+            else:
+                written = await self._db_service.sync_db_batch(
+                    to_insert,
+                    to_delete,
+                    cursor=cursor,
+                    checkpoint=checkpoint,
+                )
+
+        if checkpoint is not None:
+            self._journal.discard()
+
+        with self._stage("commit"):
+            inserted_count, deleted_count = await self._committed(written)
+
+        if self._memory_budget is not None:
+            # Location data table mirrors distinct actual identifiers after synchronization
+            self._feed_size = max(0, existing_size + inserted_count - deleted_count)
+
+            if self._memory_monitor is not None and self._memory_monitor.tracing:
+                self._memory_budget.observe(self._feed_size + existing_size, self._memory_monitor.peak)
+
+    async def _rebuilds(self, changes: int, existing_size: int) -> bool:
+        """
+        Decides, whether location_data table should be rebuilt instead of writing changes row by row.
+
+        :param changes: Number of records to be inserted & deleted
+        :param existing_size: Estimated location_data rows count, if it is already known, otherwise 0
+        :return: Whether changed share of location_data table exceeds rebuild ratio
+        and location_data table has nothing, that rebuild would not carry over
+        """
+
+        if self._rebuild_ratio is None or not changes:
+            return False
+
+        existing_size = existing_size or await self._db_service.get_count_estimate()
+
+        if changes <= self._rebuild_ratio * existing_size:
+            return False
+
+        return not await self._db_service.get_rebuild_blockers()
+
+    @EventManager.event("sync_plan")
+    async def _plan(self) -> SyncPlan:
+        """
+        Requests actual location data & resumes journaled sync plan, if it was calculated
+        from the same actual location data. Otherwise, calculates changes using reconciliation
+        strategy and journals them as new sync plan.
+
+        :return: `SyncPlan` instance. Plan without changes is not journaled and has no id
+        """
+
+        actual = await self._api_service.get_batch()
+        fingerprint = snapshot_checksum(actual.packed_keys())
+
+        plan = self._journal.load(fingerprint)
+
+        if plan is not None:
+            return plan
+
+        to_insert, to_delete = await self._strategy.diff(self._api_service, self._db_service, actual=actual)
+
+        if not to_insert and not to_delete:
+            return SyncPlan(None, fingerprint, to_insert, to_delete)
+
+        return self._journal.write(fingerprint, to_insert, to_delete)
+
+    async def _sync_full_chunked(self, partitions: int, cursor: str | None):
+        """
+        Synchronizes location data by packed key ranges, bypassing reconciliation strategy diff.
+        Actual location data is ordered by packed key once and split into contiguous ranges
+        of roughly equal size, and existing location data of every range is requested, compared
+        & written separately, so that only one range of existing location data is held in memory.
+        Cursor is stored with the last range.
+
+        :param partitions: Desired key ranges count
+        :param cursor: Optional change feed cursor, which actual location data corresponds to
+        """
+
+        with self._stage("fetch"):
+            actual = await self._api_service.get_batch()
+            actual_keys = actual.packed_keys()
+
+        self._feed_size = len(actual)
+
+        order = sorted(range(len(actual_keys)), key=actual_keys.__getitem__)
+        actual = actual.take(order)
+        actual_keys = array("q", (actual_keys[index] for index in order))
+        del order
+
+        bounds = key_range_bounds(actual_keys, partitions)
+        ranges = list(zip([None, *bounds], [*bounds, None]))
+
+        inserted = LocationDataBatch()
+        deleted = LocationDataBatch()
+        summarized = False
+
+        for number, (start, stop) in enumerate(ranges, start=1):
+            with self._stage("chunk"):
+                existing = await self._db_service.get_batch_by_key_range(start, stop)
+                to_insert, to_delete = diff_batches(
+                    actual=actual.slice(
+                        0 if start is None else bisect_left(actual_keys, start),
+                        len(actual_keys) if stop is None else bisect_left(actual_keys, stop),
+                    ),
+                    existing=existing,
+                )
+                del existing
+
+                await self._verify_coordination()
+
+                written = await self._db_service.sync_db_batch(
+                    to_insert,
+                    to_delete,
+                    cursor=cursor if number == len(ranges) else None,
+                )
+
+                if isinstance(written, WriteSummary):
+                    summarized = True
+                    continue
+
+                inserted.extend(written[0])
+                deleted.extend(written[1])
+
+        if not summarized:
+            with self._stage("commit"):
+                await self._strategy.committed(inserted, deleted)
+
+    async def _committed(
+            self,
+            written: Tuple[LocationDataBatch, LocationDataBatch] | WriteSummary,
+    ) -> Tuple[int, int]:
+        """
+        Notifies reconciliation strategy about committed location data changes,
+        if written rows have been returned by DBService.
+
+        :param written: Result of DBService `sync_db_batch` method
+        :return: Tuple, containing inserted and deleted records counts
+        """
+
+        if isinstance(written, WriteSummary):
+            return written.inserted, written.deleted
+
+        inserted, deleted = written
+        await self._strategy.committed(inserted, deleted)
+
+        return len(inserted), len(deleted)
+
+    async def _sync_shards(self):
+        """
+        Claims shards & synchronizes location data of claimed shards: actual location data
+        of claimed shards is compared with existing location data of the same shards,
+        read from database by packed key modulo shards count.
+        """
+
+        claimed = await self._coordinator.claim_shards()
+
+        if not claimed:
+            return
+
+        shards = self._coordinator.shards
+        claimed_set = set(claimed)
+
+        with self._stage("fetch"):
+            actual = await self._api_service.get_batch()
+            actual_keys = actual.packed_keys()
+
+        with self._stage("diff"):
+            existing = await self._db_service.get_batch_by_buckets(claimed, shards)
+            to_insert, to_delete = diff_batches(
+                actual=actual.take(index for index, key in enumerate(actual_keys) if key % shards in claimed_set),
+                existing=existing,
+            )
+
+        await self._verify_coordination()
+
+        with self._stage("write"):
+            await self._db_service.sync_db_batch(to_insert, to_delete)
 
     @staticmethod
     def sync_location_data(
@@ -72,10 +514,8 @@ class LocationDataSynchronizerApp:
             existing_data: List[LocationData],
     ) -> Tuple[List[LocationData], List[LocationData]]:
         """
-        Creates sets from provided lists of existing & actual `LocationData` instances.
-        Calculates difference between sets & returns tuple, whose first element is a
-        list of brand new `LocationData` instances, and whose second element is a list of
-        no longer relevant `LocationData` instances.
+        Calculates brand new & obsolete location data.
+        See `app.core.reconciliation.sync_location_data`.
 
         :param actual_data: List of `LocationData` instances
         :param existing_data: List of `LocationData` instances
@@ -83,13 +523,4 @@ class LocationDataSynchronizerApp:
         list of obsolete `LocationData` instances
         """
 
-        actual_set = {(item.lac, item.cellid, item.eci) for item in actual_data}
-        existing_set = {(item.lac, item.cellid, item.eci) for item in existing_data}
-
-        new_set = actual_set - existing_set
-        obvious_set = existing_set - actual_set
-
-        new_data = [data for data in actual_data if (data.lac, data.cellid, data.eci) in new_set]
-        obvious_data = [data for data in existing_data if (data.lac, data.cellid, data.eci) in obvious_set]
-
-        return new_data, obvious_data
+        return sync_location_data(actual_data=actual_data, existing_data=existing_data)
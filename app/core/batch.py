@@ -0,0 +1,219 @@
+"""This module contains LocationDataBatch & WriteSummary classes"""
+
+from array import array
+from typing import Iterable, Iterator, List, NamedTuple, Tuple, Sequence
+
+from app.core.models import LocationData
+from app.utils.keys import ECI_OFFSET, NO_CELLID
+
+_COLUMNS = ("id", "lac", "cellid", "eci")
+
+
+def _column(values: Sequence[int | None]) -> Tuple[array, bytearray]:
+    """
+    Splits values with nulls into values array & null mask.
+
+    :param values: Sequence of integers or None
+    :return: Tuple of values array, where nulls are replaced with 0, and null mask
+    """
+
+    return array("q", [0 if value is None else value for value in values]), bytearray(
+        value is None for value in values
+    )
+
+
+class LocationDataBatch:
+    """
+    This class is a struct-of-arrays batch of location identifiers.
+
+    Every column (id, lac, cellid, eci) is stored as `array` of signed 64-bit integers
+    with `bytearray` null mask, where 1 marks null value. Batch moves location data
+    between API, service & repository layers without creating Python object per row.
+    Iterating over batch yields `LocationData` instances, created without validation.
+    """
+
+    __slots__ = ("ids", "lac", "cellid", "eci", "id_nulls", "lac_nulls", "cellid_nulls", "eci_nulls")
+
+    def __init__(self):
+        """Construct empty batch"""
+
+        self.ids = array("q")
+        self.lac = array("q")
+        self.cellid = array("q")
+        self.eci = array("q")
+
+        self.id_nulls = bytearray()
+        self.lac_nulls = bytearray()
+        self.cellid_nulls = bytearray()
+        self.eci_nulls = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[LocationData]:
+        for identifier, lac, cellid, eci in self.rows():
+            yield LocationData.model_construct(id=identifier, lac=lac, cellid=cellid, eci=eci)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(size={len(self)})"
+
+    def append(self, identifier: int | None, lac: int | None, cellid: int | None, eci: int | None):
+        """
+        Appends location identifier to batch.
+
+        :param identifier: Record id
+        :param lac: lac value
+        :param cellid: cellid value
+        :param eci: eci value
+        """
+
+        self.ids.append(0 if identifier is None else identifier)
+        self.lac.append(0 if lac is None else lac)
+        self.cellid.append(0 if cellid is None else cellid)
+        self.eci.append(0 if eci is None else eci)
+
+        self.id_nulls.append(identifier is None)
+        self.lac_nulls.append(lac is None)
+        self.cellid_nulls.append(cellid is None)
+        self.eci_nulls.append(eci is None)
+
+    def column(self, name: str) -> List[int | None]:
+        """
+        Returns column values with nulls, e.g. to be passed as DB array parameter.
+
+        :param name: Column name: id, lac, cellid or eci
+        :return: List of integers or None
+        """
+
+        if name not in _COLUMNS:
+            raise KeyError(name)
+
+        values = self.ids if name == "id" else getattr(self, name)
+        nulls = getattr(self, f"{name}_nulls")
+
+        return [None if null else value for value, null in zip(values, nulls)]
+
+    def rows(self) -> Iterator[Tuple[int | None, int | None, int | None, int | None]]:
+        """
+        Iterates over batch rows.
+
+        :return: Iterator of (id, lac, cellid, eci) tuples
+        """
+
+        return zip(self.column("id"), self.column("lac"), self.column("cellid"), self.column("eci"))
+
+    def packed_keys(self) -> array:
+        """
+        Packs identifiers with `app.utils.keys.pack_key` rules column-wise.
+
+        :return: `array` of packed keys in batch order
+        """
+
+        return array("q", [
+            ECI_OFFSET + eci if not eci_null else (lac << 16) | (NO_CELLID if cellid_null else cellid)
+            for lac, cellid, eci, cellid_null, eci_null
+            in zip(self.lac, self.cellid, self.eci, self.cellid_nulls, self.eci_nulls)
+        ])
+
+    def take(self, indexes: Iterable[int]) -> "LocationDataBatch":
+        """
+        Creates batch, containing rows at provided positions.
+
+        :param indexes: Iterable of row positions
+        :return: `LocationDataBatch` instance
+        """
+
+        indexes = list(indexes)
+        batch = LocationDataBatch()
+
+        for name in ("ids", "lac", "cellid", "eci"):
+            values = getattr(self, name)
+            getattr(batch, name).extend(values[index] for index in indexes)
+
+        for name in ("id_nulls", "lac_nulls", "cellid_nulls", "eci_nulls"):
+            nulls = getattr(self, name)
+            setattr(batch, name, bytearray(nulls[index] for index in indexes))
+
+        return batch
+
+    def slice(self, start: int, stop: int) -> "LocationDataBatch":
+        """
+        Creates batch, containing rows within [start, stop) range.
+
+        :param start: First row position
+        :param stop: Position after the last row
+        :return: `LocationDataBatch` instance
+        """
+
+        batch = LocationDataBatch()
+
+        for name in self.__slots__:
+            setattr(batch, name, getattr(self, name)[start:stop])
+
+        return batch
+
+    def extend(self, other: "LocationDataBatch"):
+        """
+        Appends all rows of other batch.
+
+        :param other: `LocationDataBatch` instance
+        """
+
+        for name in self.__slots__:
+            getattr(self, name).extend(getattr(other, name))
+
+    @classmethod
+    def from_columns(
+            cls,
+            ids: Sequence[int | None] | None,
+            lac: Sequence[int | None] | None,
+            cellid: Sequence[int | None] | None,
+            eci: Sequence[int | None] | None,
+    ) -> "LocationDataBatch":
+        """
+        Creates batch from columns with nulls, e.g. DB arrays.
+        None column is treated as empty, e.g. result of aggregation over no rows.
+
+        :param ids: Sequence of record ids
+        :param lac: Sequence of lac values
+        :param cellid: Sequence of cellid values
+        :param eci: Sequence of eci values
+        :return: `LocationDataBatch` instance
+        """
+
+        batch = cls()
+
+        batch.ids, batch.id_nulls = _column(ids or ())
+        batch.lac, batch.lac_nulls = _column(lac or ())
+        batch.cellid, batch.cellid_nulls = _column(cellid or ())
+        batch.eci, batch.eci_nulls = _column(eci or ())
+
+        return batch
+
+    @classmethod
+    def from_models(cls, models: Iterable[LocationData]) -> "LocationDataBatch":
+        """
+        Creates batch from `LocationData` instances.
+
+        :param models: Iterable of `LocationData` instances
+        :return: `LocationDataBatch` instance
+        """
+
+        batch = cls()
+
+        for model in models:
+            batch.append(model.id, model.lac, model.cellid, model.eci)
+
+        return batch
+
+
+class WriteSummary(NamedTuple):
+    """
+    Compact result of location data synchronization, written in ids or count mode:
+    counts of inserted & deleted records and, in ids mode, `array` of their ids.
+    """
+
+    inserted: int
+    deleted: int
+    inserted_ids: array | None = None
+    deleted_ids: array | None = None
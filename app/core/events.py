@@ -2,7 +2,7 @@
 
 import functools
 
-from typing import MutableMapping, List, Any
+from typing import MutableMapping, Mapping, List, Any
 from collections.abc import Callable
 
 
@@ -46,14 +46,17 @@ class EventManager:
     events: MutableMapping[str, Event] = {}
 
     @classmethod
-    def event(cls, name: str):
+    def event(cls, name: str, details: Callable[..., Mapping[str, Any]] | None = None):
         """
         This method creates & registers new event with provided name on provided function.
+        Functions, decorated with the same event name, share one event.
 
         :param name: Event name
+        :param details: Optional callable, that receives function arguments after the call and returns
+        additional keyword arguments for event handlers, e.g. metrics, collected by method's instance
         """
 
-        cls.events[name] = Event()
+        cls.events.setdefault(name, Event())
 
         def inner(func):
             """Creates function wrapper"""
@@ -66,7 +69,12 @@ class EventManager:
                 Returns function result.
                 """
                 result = await func(*args, **kwargs)
-                cls.events[name].trigger(result)
+
+                if details is None:
+                    cls.events[name].trigger(result)
+                else:
+                    cls.events[name].trigger(result, **details(*args, **kwargs))
+
                 return result
 
             return wrapper
@@ -0,0 +1,138 @@
+"""This module contains SyncJournal & SyncPlan classes"""
+
+import os
+import struct
+import uuid
+
+from array import array
+from typing import NamedTuple
+
+from app.core.batch import LocationDataBatch
+from app.utils.files import atomic_write
+from app.utils.keys import BucketChecksum, unpack_key
+
+_MAGIC = b"LDJRNL01"
+_HEADER = struct.Struct("<8s16sQQQQQ")
+_ITEM_SIZE = 8
+
+
+class SyncPlan(NamedTuple):
+    """
+    Location data changes, calculated by full synchronization, and checksum
+    of actual location data packed keys (feed fingerprint), they were calculated from.
+    """
+
+    plan_id: str | None
+    fingerprint: BucketChecksum
+    to_insert: LocationDataBatch
+    to_delete: LocationDataBatch
+    resumed: bool = False
+
+
+class SyncJournal:
+    """
+    This class persists sync plan into local journal file, so that synchronization,
+    interrupted while applying the plan, is continued by the next run without
+    calculating difference again.
+
+    Journal file consists of a header, containing magic bytes, plan id, feed fingerprint
+    and changes counts, followed by packed keys of inserted location data, packed keys
+    of deleted location data and their ids. Arrays are native signed 64-bit integers,
+    missing id is stored as 0, since location data ids are positive.
+
+    Journal does not track applied changes: DB service stores committed position of the plan
+    under plan id within the same transaction as changes themselves.
+    """
+
+    def __init__(self, path: str):
+        """
+        Construct.
+
+        :param path: Journal file path
+        """
+
+        self._path = path
+
+    def load(self, fingerprint: BucketChecksum) -> SyncPlan | None:
+        """
+        Reads journaled sync plan, if it was calculated from actual location data
+        with provided fingerprint. Invalid or outdated journal file is removed.
+
+        :param fingerprint: Checksum of actual location data packed keys, see `snapshot_checksum`
+        :return: Resumed `SyncPlan` instance or None, if there is no valid plan
+        """
+
+        try:
+            with open(self._path, "rb") as file:
+                header = file.read(_HEADER.size)
+
+                if len(header) < _HEADER.size:
+                    raise ValueError(f"{self._path} is not a valid sync journal")
+
+                magic, plan_id, count, total, mixed, inserted, deleted = _HEADER.unpack(header)
+
+                if magic != _MAGIC or os.fstat(file.fileno()).st_size != (
+                        _HEADER.size + (inserted + 2 * deleted) * _ITEM_SIZE
+                ):
+                    raise ValueError(f"{self._path} is not a valid sync journal")
+
+                if BucketChecksum(count, total, mixed) != fingerprint:
+                    raise ValueError(f"{self._path} does not match actual location data")
+
+                inserted_keys = array("q")
+                deleted_keys = array("q")
+                deleted_ids = array("q")
+
+                inserted_keys.fromfile(file, inserted)
+                deleted_keys.fromfile(file, deleted)
+                deleted_ids.fromfile(file, deleted)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError):
+            self.discard()
+            return None
+
+        to_insert = LocationDataBatch()
+        to_delete = LocationDataBatch()
+
+        for key in inserted_keys:
+            to_insert.append(None, *unpack_key(key))
+
+        for key, identifier in zip(deleted_keys, deleted_ids):
+            to_delete.append(identifier or None, *unpack_key(key))
+
+        return SyncPlan(plan_id.hex(), fingerprint, to_insert, to_delete, resumed=True)
+
+    def write(
+            self,
+            fingerprint: BucketChecksum,
+            to_insert: LocationDataBatch,
+            to_delete: LocationDataBatch,
+    ) -> SyncPlan:
+        """
+        Writes new sync plan into journal file atomically, see `app.utils.files.atomic_write`.
+
+        :param fingerprint: Checksum of actual location data packed keys, see `snapshot_checksum`
+        :param to_insert: `LocationDataBatch` to be inserted
+        :param to_delete: `LocationDataBatch` to be deleted
+        :return: `SyncPlan` instance
+        """
+
+        plan_id = uuid.uuid4().bytes
+
+        with atomic_write(self._path) as file:
+            file.write(_HEADER.pack(_MAGIC, plan_id, *fingerprint, len(to_insert), len(to_delete)))
+            to_insert.packed_keys().tofile(file)
+            to_delete.packed_keys().tofile(file)
+            # Batch stores missing ids as 0 already
+            to_delete.ids.tofile(file)
+
+        return SyncPlan(plan_id.hex(), fingerprint, to_insert, to_delete)
+
+    def discard(self):
+        """Removes journal file, e.g. after its plan has been applied"""
+
+        try:
+            os.remove(self._path)
+        except FileNotFoundError:
+            pass
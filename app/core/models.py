@@ -32,6 +32,30 @@ def is_eci_valid(value: int | None) -> int | None:
     raise ValueError
 
 
+def is_identifier_valid(lac: int | None, cellid: int | None, eci: int | None) -> bool:
+    """
+    Check if location identifier values & their combination are valid
+    without creating `LocationData` instance. Values must be integers or None:
+    values of other types, which `LocationData` may coerce, are not valid for this check.
+    """
+
+    for value in (lac, cellid, eci):
+        if value is not None and type(value) is not int:
+            return False
+
+    try:
+        is_lac_valid(lac)
+        is_cellid_valid(cellid)
+        is_eci_valid(eci)
+    except ValueError:
+        return False
+
+    if eci is not None:
+        return lac is None and cellid is None
+
+    return lac is not None
+
+
 class LocationData(BaseModel):
     """This model describes location identifier fields & their validation"""
 
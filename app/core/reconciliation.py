@@ -0,0 +1,380 @@
+"""This module contains location data reconciliation strategies"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+
+from typing import List, Tuple, Sequence, TYPE_CHECKING
+from abc import ABC, abstractmethod
+
+from app.core.batch import LocationDataBatch
+from app.core.models import LocationData
+from app.utils.keys import unpack_key, bucket_checksums
+from app.utils.snapshot import LocationDataSnapshot, header_checksum
+
+if TYPE_CHECKING:
+    from app.services.db import DBService
+    from app.services.api import APIService
+
+
+def sync_location_data(
+        actual_data: List[LocationData],
+        existing_data: List[LocationData],
+) -> Tuple[List[LocationData], List[LocationData]]:
+    """
+    Creates sets from provided lists of existing & actual `LocationData` instances.
+    Calculates difference between sets & returns tuple, whose first element is a
+    list of brand new `LocationData` instances, and whose second element is a list of
+    no longer relevant `LocationData` instances. Duplicate actual identifiers are inserted once.
+
+    :param actual_data: List of `LocationData` instances
+    :param existing_data: List of `LocationData` instances
+    :return: A tuple containing list of brand new `LocationData` instances and
+    list of obsolete `LocationData` instances
+    """
+
+    actual_set = {(item.lac, item.cellid, item.eci) for item in actual_data}
+    existing_set = {(item.lac, item.cellid, item.eci) for item in existing_data}
+
+    new_set = actual_set - existing_set
+    obvious_set = existing_set - actual_set
+
+    new_data = []
+
+    for data in actual_data:
+        key = (data.lac, data.cellid, data.eci)
+
+        if key in new_set:
+            new_set.discard(key)
+            new_data.append(data)
+
+    obvious_data = [data for data in existing_data if (data.lac, data.cellid, data.eci) in obvious_set]
+
+    return new_data, obvious_data
+
+
+def diff_batches(
+        actual: LocationDataBatch,
+        existing: LocationDataBatch,
+) -> Tuple[LocationDataBatch, LocationDataBatch]:
+    """
+    Calculates difference between actual & existing batches by their packed keys,
+    like `sync_location_data` does for lists of `LocationData` instances.
+
+    :param actual: `LocationDataBatch` of actual location data
+    :param existing: `LocationDataBatch` of existing location data
+    :return: A tuple containing batch of brand new and batch of obsolete location data
+    """
+
+    actual_keys = actual.packed_keys()
+    existing_keys = existing.packed_keys()
+
+    actual_set = set(actual_keys)
+    existing_set = set(existing_keys)
+
+    obsolete = [index for index, key in enumerate(existing_keys) if key not in actual_set]
+    new = []
+
+    for index, key in enumerate(actual_keys):
+        if key not in existing_set:
+            existing_set.add(key)
+            new.append(index)
+
+    return actual.take(new), existing.take(obsolete)
+
+
+def key_range_bounds(keys: Sequence[int], partitions: int, samples: int = 64) -> List[int]:
+    """
+    Splits packed keys space into key ranges, containing roughly equal number of provided keys.
+    Bounds are taken from sorted sample of keys, so that keys are not sorted as a whole.
+
+    :param keys: Sequence of packed keys
+    :param partitions: Desired ranges count
+    :param samples: Sampled keys per range
+    :return: Sorted list of distinct bounds. N bounds split keys space into N + 1 ranges
+    """
+
+    if partitions <= 1 or not keys:
+        return []
+
+    step = max(1, len(keys) // (partitions * samples))
+    sample = sorted(keys[::step])
+
+    bounds = {sample[len(sample) * part // partitions] for part in range(1, partitions)}
+    bounds.discard(sample[0])
+
+    return sorted(bounds)
+
+
+async def _actual(api_service: APIService[LocationData], actual: LocationDataBatch | None) -> LocationDataBatch:
+    """
+    Returns already requested actual location data or requests it from APIService.
+
+    :param api_service: `APIService` instance
+    :param actual: Optional `LocationDataBatch` of actual location data
+    :return: `LocationDataBatch` instance
+    """
+
+    return actual if actual is not None else await api_service.get_batch()
+
+
+class ReconciliationStrategy(ABC):
+    """
+    This base class abstracts the way actual location data is compared
+    with location data, stored in database.
+    """
+
+    @abstractmethod
+    async def diff(
+            self,
+            api_service: APIService[LocationData],
+            db_service: DBService[LocationData],
+            actual: LocationDataBatch | None = None,
+    ) -> Tuple[LocationDataBatch, LocationDataBatch]:
+        """
+        Calculates location data to be inserted & deleted.
+
+        :param api_service: `APIService` instance
+        :param db_service: `DBService` instance
+        :param actual: Optional `LocationDataBatch` of actual location data, if it has already been requested
+        :return: A tuple containing batch of brand new and batch of obsolete location data
+        """
+
+    async def committed(self, inserted: LocationDataBatch, deleted: LocationDataBatch):
+        """
+        Notifies strategy about location data changes, committed to database.
+        Does nothing by default.
+
+        :param inserted: `LocationDataBatch` of inserted location data
+        :param deleted: `LocationDataBatch` of deleted location data
+        """
+
+
+class FullReconciliation(ReconciliationStrategy):
+    """This strategy reads the whole location_data table and compares it with actual data"""
+
+    async def diff(
+            self,
+            api_service: APIService[LocationData],
+            db_service: DBService[LocationData],
+            actual: LocationDataBatch | None = None,
+    ) -> Tuple[LocationDataBatch, LocationDataBatch]:
+        """
+        Requests actual location data from APIService & existing location data from DBService.
+        Synchronizes actual & existing location data using `diff_batches` function.
+
+        :param api_service: `APIService` instance
+        :param db_service: `DBService` instance
+        :param actual: Optional `LocationDataBatch` of actual location data, if it has already been requested
+        :return: A tuple containing batch of brand new and batch of obsolete location data
+        """
+
+        actual, existing = await asyncio.gather(
+            _actual(api_service, actual),
+            db_service.get_batch(),
+        )
+
+        return diff_batches(actual=actual, existing=existing)
+
+
+class ChecksumReconciliation(ReconciliationStrategy):
+    """
+    This strategy splits packed keys space into buckets and compares per-bucket
+    count & hash aggregates of actual data with the ones, computed by database.
+    Only mismatching buckets are read and compared row by row, so low-churn
+    synchronization of a huge table does not transfer the whole table.
+    """
+
+    def __init__(self, buckets: int = 1024):
+        """
+        Construct.
+
+        :param buckets: Buckets count
+        """
+
+        self._buckets = buckets
+
+    async def diff(
+            self,
+            api_service: APIService[LocationData],
+            db_service: DBService[LocationData],
+            actual: LocationDataBatch | None = None,
+    ) -> Tuple[LocationDataBatch, LocationDataBatch]:
+        """
+        Requests actual location data from APIService & bucket checksums from DBService.
+        Requests existing location data of mismatching buckets only and synchronizes it with
+        actual location data of the same buckets using `diff_batches` function.
+
+        :param api_service: `APIService` instance
+        :param db_service: `DBService` instance
+        :param actual: Optional `LocationDataBatch` of actual location data, if it has already been requested
+        :return: A tuple containing batch of brand new and batch of obsolete location data
+        """
+
+        actual, db_checksums = await asyncio.gather(
+            _actual(api_service, actual),
+            db_service.get_bucket_checksums(self._buckets),
+        )
+
+        actual_keys = actual.packed_keys()
+        api_checksums = bucket_checksums(actual_keys, self._buckets)
+
+        mismatched = {
+            bucket for bucket in api_checksums.keys() | db_checksums.keys()
+            if api_checksums.get(bucket) != db_checksums.get(bucket)
+        }
+
+        if not mismatched:
+            return LocationDataBatch(), LocationDataBatch()
+
+        existing = await db_service.get_batch_by_buckets(sorted(mismatched), self._buckets)
+
+        actual = actual.take(
+            index for index, key in enumerate(actual_keys)
+            if key % self._buckets in mismatched
+        )
+
+        return diff_batches(actual=actual, existing=existing)
+
+
+class SnapshotReconciliation(ReconciliationStrategy):
+    """
+    This strategy compares actual data with the last committed location data snapshot,
+    persisted as memory-mapped `LocationDataSnapshot` file, instead of reading location_data table.
+
+    On startup snapshot file is mapped without copying and its checksum of packed keys & ids
+    is compared with the same checksum of location_data table, computed by database. The table is read only if
+    snapshot is missing or does not match it. Snapshot file is rewritten after every commit.
+    """
+
+    def __init__(self, path: str):
+        """
+        Construct.
+
+        :param path: Snapshot file path
+        """
+
+        self._path = path
+        self._snapshot: LocationDataSnapshot | None = None
+        self._pending: Tuple[int, int] | None = None
+
+    async def diff(
+            self,
+            api_service: APIService[LocationData],
+            db_service: DBService[LocationData],
+            actual: LocationDataBatch | None = None,
+    ) -> Tuple[LocationDataBatch, LocationDataBatch]:
+        """
+        Requests actual location data from APIService, loading snapshot on first call.
+        Compares sorted packed keys of actual location data with snapshot keys.
+
+        :param api_service: `APIService` instance
+        :param db_service: `DBService` instance
+        :param actual: Optional `LocationDataBatch` of actual location data, if it has already been requested
+        :return: A tuple containing batch of brand new and batch of obsolete location data
+        """
+
+        if self._snapshot is None:
+            actual, _ = await asyncio.gather(_actual(api_service, actual), self._load(db_service))
+        else:
+            actual = await _actual(api_service, actual)
+
+        actual_keys = actual.packed_keys()
+        order = sorted(range(len(actual_keys)), key=actual_keys.__getitem__)
+
+        keys, ids = self._snapshot.keys, self._snapshot.ids
+        position, size = 0, len(keys)
+
+        new = []
+        to_delete = LocationDataBatch()
+        previous = None
+
+        for index in order:
+            key = actual_keys[index]
+
+            if key == previous:
+                continue
+
+            previous = key
+
+            while position < size and keys[position] < key:
+                to_delete.append(ids[position], *unpack_key(keys[position]))
+                position += 1
+
+            if position < size and keys[position] == key:
+                position += 1
+            else:
+                new.append(index)
+
+        for position in range(position, size):
+            to_delete.append(ids[position], *unpack_key(keys[position]))
+
+        to_insert = actual.take(sorted(new))
+        self._pending = len(to_insert), len(to_delete)
+
+        return to_insert, to_delete
+
+    async def committed(self, inserted: LocationDataBatch, deleted: LocationDataBatch):
+        """
+        Rewrites snapshot file with committed location data changes & maps it again.
+        If fewer rows were changed than calculated by `diff`, location_data table has
+        been changed by someone else, so snapshot is dropped and verified again on next call.
+
+        :param inserted: `LocationDataBatch` of inserted location data
+        :param deleted: `LocationDataBatch` of deleted location data
+        """
+
+        pending, self._pending = self._pending, None
+
+        if self._snapshot is None:
+            return
+
+        if pending is not None and pending != (len(inserted), len(deleted)):
+            self._snapshot.close()
+            self._snapshot = None
+            return
+
+        if not inserted and not deleted:
+            return
+
+        deleted_ids = set(deleted.ids)
+        inserted_items = sorted(zip(inserted.packed_keys(), inserted.ids))
+        kept_items = (
+            (key, identifier)
+            for key, identifier in zip(self._snapshot.keys, self._snapshot.ids)
+            if identifier not in deleted_ids
+        )
+
+        LocationDataSnapshot.write(self._path, heapq.merge(kept_items, inserted_items))
+
+        self._snapshot.close()
+        self._snapshot = LocationDataSnapshot(self._path)
+
+    async def _load(self, db_service: DBService[LocationData]):
+        """
+        Maps snapshot file and verifies it against location_data table checksum.
+        Rebuilds snapshot file from location_data table, if it is missing or outdated.
+
+        :param db_service: `DBService` instance
+        """
+
+        try:
+            snapshot = LocationDataSnapshot(self._path)
+        except (OSError, ValueError):
+            snapshot = None
+
+        db_checksum = header_checksum(await db_service.get_snapshot_checksum())
+
+        if snapshot is not None and snapshot.checksum == db_checksum:
+            self._snapshot = snapshot
+            return
+
+        if snapshot is not None:
+            snapshot.close()
+
+        existing = await db_service.get_batch()
+
+        LocationDataSnapshot.write(self._path, sorted(zip(existing.packed_keys(), existing.ids)))
+
+        self._snapshot = LocationDataSnapshot(self._path)
@@ -1,4 +1,13 @@
 """This package contains DB repositories"""
 
-from app.db.repositories.base import DBRepository
+from app.db.repositories.base import (
+    DBRepository,
+    StateDBRepository,
+    ReplicationDBRepository,
+    LockDBRepository,
+    WriteMode,
+)
 from app.db.repositories.location_data import LocationDataDBRepository
+from app.db.repositories.sync_state import SyncStateDBRepository
+from app.db.repositories.replication import PostgresReplicationDBRepository
+from app.db.repositories.locks import PostgresLockDBRepository
@@ -1,12 +1,19 @@
 """This module contains BaseRepository class"""
 
-from typing import Generic, TypeVar, List
+from array import array
+from typing import Generic, TypeVar, List, Dict, Iterable, Literal, Tuple
 from abc import ABC, abstractmethod
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
+
+from app.core.batch import LocationDataBatch
+from app.utils.keys import BucketChecksum
 
 T = TypeVar("T")
 
+# Written records, returned by insert & delete methods: full rows, only ids or only count
+WriteMode = Literal["rows", "ids", "count"]
+
 
 class DBRepository(ABC, Generic[T]):
     """This base class describes abstract repository methods"""
@@ -16,9 +23,137 @@ class DBRepository(ABC, Generic[T]):
         pass
 
     @abstractmethod
-    async def insert_many(self, records: List[T], session: AsyncSession) -> List[T]:
+    async def get_batch(self, session: AsyncSession) -> LocationDataBatch:
+        pass
+
+    @abstractmethod
+    async def get_batch_by_buckets(
+            self,
+            bucket_ids: Iterable[int],
+            buckets: int,
+            session: AsyncSession,
+    ) -> LocationDataBatch:
+        pass
+
+    @abstractmethod
+    async def get_batch_by_key_range(
+            self,
+            start: int | None,
+            stop: int | None,
+            session: AsyncSession,
+    ) -> LocationDataBatch:
+        pass
+
+    @abstractmethod
+    async def get_count_estimate(self, session: AsyncSession) -> int:
+        pass
+
+    @abstractmethod
+    async def get_bucket_checksums(self, buckets: int, session: AsyncSession) -> Dict[int, BucketChecksum]:
+        pass
+
+    @abstractmethod
+    async def get_snapshot_checksum(self, session: AsyncSession) -> BucketChecksum:
+        pass
+
+    @abstractmethod
+    async def insert_many(
+            self,
+            records: List[T],
+            session: AsyncSession,
+            mode: WriteMode = "rows",
+    ) -> List[T] | array | int:
+        pass
+
+    @abstractmethod
+    async def delete_many(
+            self,
+            records: List[T],
+            session: AsyncSession,
+            mode: WriteMode = "rows",
+    ) -> List[T] | array | int:
+        pass
+
+    @abstractmethod
+    async def insert_batch(
+            self,
+            batch: LocationDataBatch,
+            session: AsyncSession,
+            mode: WriteMode = "rows",
+    ) -> LocationDataBatch | array | int:
+        pass
+
+    @abstractmethod
+    async def delete_batch(
+            self,
+            batch: LocationDataBatch,
+            session: AsyncSession,
+            mode: WriteMode = "rows",
+    ) -> LocationDataBatch | array | int:
+        pass
+
+    @abstractmethod
+    async def get_rebuild_blockers(self, session: AsyncSession) -> List[str]:
+        pass
+
+    @abstractmethod
+    async def rebuild_batch(
+            self,
+            to_insert: LocationDataBatch,
+            to_delete: LocationDataBatch,
+            session: AsyncSession,
+            mode: WriteMode = "rows",
+    ) -> Tuple[LocationDataBatch | array | int, LocationDataBatch | array | int]:
+        pass
+
+
+class StateDBRepository(ABC):
+    """This base class describes abstract synchronizer state repository methods"""
+
+    @abstractmethod
+    async def get(self, name: str, session: AsyncSession) -> str | None:
+        pass
+
+    @abstractmethod
+    async def set(self, name: str, value: str | None, session: AsyncSession):
+        pass
+
+
+class ReplicationDBRepository(ABC):
+    """This base class describes abstract database server replication status methods"""
+
+    @abstractmethod
+    async def get_wal_position(self, session: AsyncSession) -> int:
+        pass
+
+    @abstractmethod
+    async def get_replay_position(self, session: AsyncSession) -> int | None:
+        pass
+
+    @abstractmethod
+    async def get_replication_lag(self, session: AsyncSession) -> float:
+        pass
+
+
+class LockDBRepository(ABC):
+    """This base class describes abstract database advisory locks methods"""
+
+    @abstractmethod
+    async def try_lock(self, namespace: int, key: int, connection: AsyncConnection, shared: bool = False) -> bool:
+        pass
+
+    @abstractmethod
+    async def unlock(self, namespace: int, key: int, connection: AsyncConnection, shared: bool = False) -> bool:
+        pass
+
+    @abstractmethod
+    async def count_holders(self, namespace: int, key: int, connection: AsyncConnection) -> int:
+        pass
+
+    @abstractmethod
+    async def set_lease(self, seconds: float, connection: AsyncConnection):
         pass
 
     @abstractmethod
-    async def delete_many(self, records: List[T], session: AsyncSession) -> List[T]:
+    async def ping(self, connection: AsyncConnection):
         pass
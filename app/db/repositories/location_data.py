@@ -1,15 +1,242 @@
 """This module contains Location Data repository"""
 
-from typing import List
-from itertools import batched
+import itertools
+import time
 
-from sqlalchemy import select, delete, insert
+from array import array
+from typing import List, Dict, Iterable, Iterator, Tuple
+
+from sqlalchemy import (
+    select,
+    delete,
+    bindparam,
+    literal_column,
+    any_,
+    exists,
+    func,
+    Column,
+    Index,
+    Integer,
+    BigInteger,
+    String,
+    MetaData,
+    Table,
+    FromClause,
+    Select,
+    Delete,
+    text,
+    Row,
+)
+from sqlalchemy.dialects.postgresql import insert, ARRAY, REGCLASS, Insert
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.sql.visitors import replacement_traverse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.repositories.base import DBRepository
-from app.db.tables import location_data, LocationDataRow
+from app.core.batch import LocationDataBatch
+from app.utils.batching import AdaptiveBatcher
+from app.utils.keys import BucketChecksum, MIX_MULTIPLIER, MIX_SHIFT, MIX_FOLD_SHIFT, pack_key
+from app.db.repositories.base import DBRepository, WriteMode
+from app.db.tables import location_data, location_data_packed_key, LocationDataRow
 
 _BATCH_SIZE = 10_000
+# PostgreSQL protocol limit of bind parameters per statement
+_MAX_PARAMETERS = 32_767
+
+
+def _literal(value: int):
+    """
+    Renders integer constant inline, so that equal expressions in SELECT & GROUP BY
+    clauses are not distinguished by their bound parameters.
+    """
+
+    return literal_column(str(int(value)), BigInteger)
+
+
+_packed_key = location_data_packed_key
+
+
+def _mix(key):
+    """
+    Creates SQL expression, scrambling packed key expression like `app.utils.keys.mix_key`.
+
+    :param key: Packed key SQL expression
+    :return: Mixed key SQL expression
+    """
+
+    mixed = key.op("#")(key.op(">>")(_literal(MIX_SHIFT))) * _literal(MIX_MULTIPLIER)
+
+    return mixed.op("#")(mixed.op(">>")(_literal(MIX_FOLD_SHIFT)))
+
+
+_mixed_key = _mix(_packed_key)
+_mixed_item = _mixed_key.op("#")(_mix(location_data.c.id.cast(BigInteger)))
+
+# Removed records are matched by their packed keys, so that deletion is served
+# by `location_data_packed_key` index and may be planned as hash join
+_removed_keys = func.unnest(
+    bindparam("removed_keys", type_=ARRAY(BigInteger)),
+).table_valued("key").render_derived(name="removed_keys")
+_matches_removed_keys = _packed_key == _removed_keys.c.key
+
+_inserted_keys = func.unnest(
+    bindparam("inserted_lac", type_=ARRAY(Integer)),
+    bindparam("inserted_cellid", type_=ARRAY(Integer)),
+    bindparam("inserted_eci", type_=ARRAY(Integer)),
+).table_valued("lac", "cellid", "eci").render_derived(name="inserted_keys")
+
+
+_count_estimate = text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)")
+
+# Table properties & dependent objects, that are not carried over to shadow table by rebuild
+_rebuild_blockers = text("""
+    SELECT DISTINCT blocker FROM (
+        SELECT 'privileges' AS blocker FROM pg_class WHERE oid = to_regclass(:name) AND relacl IS NOT NULL
+        UNION ALL
+        SELECT 'triggers' FROM pg_trigger WHERE tgrelid = to_regclass(:name) AND NOT tgisinternal
+        UNION ALL
+        SELECT 'policies' FROM pg_policy WHERE polrelid = to_regclass(:name)
+        UNION ALL
+        SELECT 'comments' FROM pg_description
+        WHERE classoid = 'pg_class'::regclass AND objoid = to_regclass(:name)
+        UNION ALL
+        SELECT 'dependent objects' FROM pg_depend
+        WHERE refclassid = 'pg_class'::regclass AND refobjid = to_regclass(:name) AND deptype = 'n'
+        UNION ALL
+        SELECT 'undeclared indexes' FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid
+        WHERE pg_index.indrelid = to_regclass(:name) AND NOT pg_class.relname::text = ANY(:indexes)
+        UNION ALL
+        SELECT 'id without serial sequence' FROM pg_attribute
+        WHERE attrelid = to_regclass(:name) AND attname = 'id'
+        AND (attidentity <> '' OR pg_get_serial_sequence(:name, 'id') IS NULL)
+    ) AS blockers
+    ORDER BY blocker
+""").bindparams(bindparam("indexes", type_=ARRAY(String)))
+
+# Shadow table has location_data columns without defaults & constraints,
+# it is created with LIKE statement and used to build statements only
+_shadow_location_data = Table(
+    f"{location_data.name}_shadow",
+    MetaData(),
+    *(Column(column.name, column.type) for column in location_data.columns),
+)
+
+
+def _shadow_index(index: Index) -> Index:
+    """
+    Declares index of shadow table like provided location_data index,
+    replacing location_data columns in index expressions with shadow table columns.
+
+    :param index: location_data `Index` instance
+    :return: `Index` instance, associated with shadow table
+    """
+
+    shadow_index = Index(
+        f"{index.name}_shadow",
+        *(
+            replacement_traverse(
+                expression,
+                {},
+                lambda element: (
+                    _shadow_location_data.c[element.name]
+                    if isinstance(element, Column) and element.table is location_data
+                    else None
+                ),
+            )
+            for expression in index.expressions
+        ),
+        unique=index.unique,
+        **index.dialect_kwargs,
+    )
+    _shadow_location_data.append_constraint(shadow_index)
+
+    return shadow_index
+
+
+_shadow_indexes = [(_shadow_index(index), index.name) for index in location_data.indexes]
+_matches_deleted_keys = exists().where(_matches_removed_keys)
+
+
+def _aggregate(records: FromClause) -> Select:
+    """
+    Creates statement, that aggregates id, lac, cellid & eci columns of provided
+    records into four arrays, so that records are transferred column-wise.
+
+    :param records: Table, subquery or CTE with id, lac, cellid & eci columns
+    :return: `Select` instance
+    """
+
+    return select(
+        func.array_agg(records.c.id),
+        func.array_agg(records.c.lac),
+        func.array_agg(records.c.cellid),
+        func.array_agg(records.c.eci),
+    )
+
+
+def _collect(records: FromClause, mode: WriteMode) -> Select:
+    """
+    Creates statement, that aggregates provided records according to write mode:
+    rows are aggregated into four arrays, ids into one array, or only records are counted.
+
+    :param records: Table, subquery or CTE with id column and, in rows mode, lac, cellid & eci columns
+    :param mode: Write mode
+    :return: `Select` instance
+    """
+
+    if mode == "rows":
+        return _aggregate(records)
+
+    if mode == "ids":
+        return select(func.array_agg(records.c.id))
+
+    return select(func.count()).select_from(records)
+
+
+def _returning(stmt: Insert | Delete, name: str, mode: WriteMode) -> Select:
+    """
+    Wraps insert or delete statement into CTE & aggregates written records according to write mode.
+    See `_collect`.
+
+    :param stmt: `Insert` or `Delete` instance without RETURNING clause
+    :param name: CTE name
+    :param mode: Write mode
+    :return: `Select` instance
+    """
+
+    if mode == "rows":
+        stmt = stmt.returning(location_data.c.id, location_data.c.lac, location_data.c.cellid, location_data.c.eci)
+    else:
+        stmt = stmt.returning(location_data.c.id)
+
+    return _collect(stmt.cte(name), mode)
+
+
+def _empty(mode: WriteMode) -> LocationDataBatch | array | int:
+    """Creates empty written records accumulator for write mode"""
+
+    if mode == "rows":
+        return LocationDataBatch()
+
+    return array("q") if mode == "ids" else 0
+
+
+def _written(record: Row, mode: WriteMode) -> LocationDataBatch | array | int:
+    """Converts aggregated written records of a statement, created by `_returning`"""
+
+    if mode == "rows":
+        return LocationDataBatch.from_columns(*record)
+
+    return array("q", record[0] or ()) if mode == "ids" else record[0]
+
+
+def _combine(total: LocationDataBatch | array | int, written: LocationDataBatch | array | int):
+    """Adds written records of a statement to accumulator, created by `_empty`"""
+
+    if isinstance(total, int):
+        return total + written
+
+    total.extend(written)
+    return total
 
 
 class LocationDataDBRepository(DBRepository[LocationDataRow]):
@@ -23,8 +250,49 @@ class LocationDataDBRepository(DBRepository[LocationDataRow]):
     - Full control over statements creation and its execution. Using bulk delete & insert is much faster
       than inserting over Unit of Work ORM pattern.
     - Using ORM mapping models degrades performance significantly due to its identity mapping.
+
+    Bulk statements are split into batches of fixed size or, if `AdaptiveBatcher` is provided,
+    of size, tuned toward target statement duration. Batches never exceed bind parameters limit.
     """
 
+    def __init__(self, batcher: AdaptiveBatcher | None = None):
+        """
+        Construct.
+
+        :param batcher: Optional `AdaptiveBatcher` instance
+        """
+
+        self._batcher = batcher
+
+    def _chunks(self, operation: str, total: int, parameters_per_row: int = 0) -> Iterator[Tuple[int, int]]:
+        """
+        Splits rows into batches & measures duration of statement, executed for every batch,
+        until the next batch is requested.
+
+        :param operation: Statement kind, batch size is tuned for
+        :param total: Rows count
+        :param parameters_per_row: Bind parameters per row. Array parameters are not counted
+        :return: Iterator of (start, stop) row positions of batches
+        """
+
+        start = 0
+
+        while start < total:
+            size = _BATCH_SIZE if self._batcher is None else self._batcher.size(operation)
+
+            if parameters_per_row:
+                size = min(size, _MAX_PARAMETERS // parameters_per_row)
+
+            stop = min(total, start + size)
+            started = time.perf_counter()
+
+            yield start, stop
+
+            if self._batcher is not None:
+                self._batcher.observe(operation, stop - start, time.perf_counter() - started)
+
+            start = stop
+
     async def get(self, session: AsyncSession) -> List[LocationDataRow]:
         """
         Get all records from location_data table & return LocationData instances.
@@ -38,48 +306,431 @@ class LocationDataDBRepository(DBRepository[LocationDataRow]):
 
         return data
 
-    async def insert_many(self, records: List[LocationDataRow], session: AsyncSession) -> List[LocationDataRow]:
+    async def get_batch(self, session: AsyncSession) -> LocationDataBatch:
+        """
+        Get all records from location_data table as columnar batch.
+        Every column is aggregated into a single array on the database side,
+        so no Row object is created per record.
+
+        :param session: `AsyncSession` instance
+        :return: `LocationDataBatch` instance
+        """
+
+        result = await session.execute(_aggregate(location_data))
+
+        return LocationDataBatch.from_columns(*result.one())
+
+    async def get_batch_by_buckets(
+            self,
+            bucket_ids: Iterable[int],
+            buckets: int,
+            session: AsyncSession,
+    ) -> LocationDataBatch:
+        """
+        Get records from location_data table, whose packed key falls into provided buckets.
+        Bucket numbers are bound as a single array, so their count is not limited by bind parameters.
+
+        :param bucket_ids: Iterable of bucket numbers
+        :param buckets: Buckets count
+        :param session: `AsyncSession` instance
+        :return: `LocationDataBatch` instance
+        """
+
+        stmt = _aggregate(location_data).where(
+            (_packed_key % _literal(buckets)) == any_(bindparam("bucket_ids", type_=ARRAY(BigInteger)))
+        )
+        result = await session.execute(stmt, {"bucket_ids": list(bucket_ids)})
+
+        return LocationDataBatch.from_columns(*result.one())
+
+    async def get_batch_by_key_range(
+            self,
+            start: int | None,
+            stop: int | None,
+            session: AsyncSession,
+    ) -> LocationDataBatch:
+        """
+        Get records from location_data table, whose packed key falls into [start, stop) range.
+        Range is filtered by the packed key expression of `location_data_packed_key` index,
+        so that only records within the range are scanned.
+
+        :param start: Lowest packed key or None for unbounded range
+        :param stop: Packed key after the highest one or None for unbounded range
+        :param session: `AsyncSession` instance
+        :return: `LocationDataBatch` instance
+        """
+
+        stmt = _aggregate(location_data)
+
+        if start is not None:
+            stmt = stmt.where(_packed_key >= bindparam("start", start, type_=BigInteger))
+
+        if stop is not None:
+            stmt = stmt.where(_packed_key < bindparam("stop", stop, type_=BigInteger))
+
+        result = await session.execute(stmt)
+
+        return LocationDataBatch.from_columns(*result.one())
+
+    async def get_count_estimate(self, session: AsyncSession) -> int:
+        """
+        Get location_data table rows count, estimated by planner statistics,
+        without scanning the table.
+
+        If table has never been vacuumed or analyzed, there is no estimate, and rows are counted.
+
+        :param session: `AsyncSession` instance
+        :return: Estimated rows count
+        """
+
+        result = await session.execute(_count_estimate, {"name": location_data.name})
+        estimate = result.scalar()
+
+        if estimate is None or estimate < 0:
+            result = await session.execute(select(func.count()).select_from(location_data))
+            estimate = result.scalar_one()
+
+        return estimate
+
+    async def get_bucket_checksums(self, buckets: int, session: AsyncSession) -> Dict[int, BucketChecksum]:
+        """
+        Compute per-bucket checksums of location_data packed keys on the database side
+        with a single GROUP BY statement. Matches `app.utils.keys.bucket_checksums`.
+
+        :param buckets: Buckets count
+        :param session: `AsyncSession` instance
+        :return: Mapping of bucket number to its `BucketChecksum`. Empty buckets are omitted
+        """
+
+        bucket = (_packed_key % _literal(buckets)).label("bucket")
+        stmt = select(
+            bucket,
+            func.count(),
+            func.sum(_packed_key),
+            func.sum(_mixed_key),
+        ).group_by(bucket)
+
+        records = await session.execute(stmt)
+
+        return {
+            bucket_id: BucketChecksum(count, int(total), int(mixed))
+            for bucket_id, count, total, mixed in records.all()
+        }
+
+    async def get_snapshot_checksum(self, session: AsyncSession) -> BucketChecksum:
+        """
+        Compute checksum of location_data packed keys & ids on the database side.
+        Matches `app.utils.snapshot.snapshot_checksum` with ids, before reduction to header.
+
+        :param session: `AsyncSession` instance
+        :return: `BucketChecksum` instance
+        """
+
+        result = await session.execute(
+            select(func.count(), func.coalesce(func.sum(_packed_key), 0), func.coalesce(func.sum(_mixed_item), 0))
+        )
+        count, total, mixed = result.one()
+
+        return BucketChecksum(count, int(total), int(mixed))
+
+    async def insert_many(
+            self,
+            records: List[LocationDataRow],
+            session: AsyncSession,
+            mode: WriteMode = "rows",
+    ) -> List[LocationDataRow] | array | int:
         """
         Insert many records.
         Maps `LocationData` instances to batched list of values dicts.
         Executes insert statements with values from batches.
+        In count mode inserted records are counted by database like in `insert_batch`.
+
+        Records, whose identifier already exists, are skipped with ``ON CONFLICT DO NOTHING``
+        relying on `location_data_identifier_key` unique index, so retried or overlapping
+        synchronizations are idempotent.
 
         :param records: List of `LocationData` instances
         :param session: `AsyncSession` instance
-        :return: List of inserted `LocationData` instances
+        :param mode: Write mode: return inserted rows, their ids or their count only
+        :return: List of actually inserted `LocationData` instances, `array` of their ids or their count
         """
 
         values = [{"lac": record.lac, "cellid": record.cellid, "eci": record.eci} for record in records]
-        batched_values = batched(values, _BATCH_SIZE)
+        returning = location_data if mode == "rows" else location_data.c.id
 
         inserted_records = []
+        inserted_count = 0
+
+        for start, stop in self._chunks("insert", len(values), parameters_per_row=3):
+            stmt = insert(location_data).on_conflict_do_nothing()
 
-        for batch in batched_values:
-            stmt = insert(location_data).returning(location_data)
-            result = await session.execute(stmt, batch)
-            inserted_records.extend(result.all())
+            if mode == "count":
+                result = await session.execute(_returning(stmt.values(values[start:stop]), name="inserted", mode=mode))
+                inserted_count += result.scalar_one()
+            else:
+                result = await session.execute(stmt.returning(returning), values[start:stop])
+                inserted_records.extend(result.all())
 
-        return [LocationDataRow(*record) for record in inserted_records]
+        return inserted_count if mode == "count" else self._records(inserted_records, mode)
 
-    async def delete_many(self, records: List[LocationDataRow], session: AsyncSession) -> List[LocationDataRow]:
+    async def delete_many(
+            self,
+            records: List[LocationDataRow],
+            session: AsyncSession,
+            mode: WriteMode = "rows",
+    ) -> List[LocationDataRow] | array | int:
         """
         Delete many records.
         Maps `LocationData` instances to list of ids, which records will be removed.
+        Records without id (e.g. received from change feed) are matched by packed key
+        of their (lac, cellid, eci) identifier instead.
         Executes delete statements with values from batches.
+        In count mode deleted records are counted by database like in `delete_batch`.
 
         :param records: List of `LocationData` instances
         :param session: `AsyncSession` instance
-        :return: List of deleted `LocationData` instances
+        :param mode: Write mode: return deleted rows, their ids or their count only
+        :return: List of deleted `LocationData` instances, `array` of their ids or their count
         """
 
         ids = [record.id for record in records if record.id is not None]
-        batched_ids = batched(ids, _BATCH_SIZE)
+        keys = [pack_key(record.lac, record.cellid, record.eci) for record in records if record.id is None]
+        returning = location_data if mode == "rows" else location_data.c.id
 
         removed_records = []
+        removed_count = 0
+
+        statements = (
+            (delete(location_data).where(location_data.c.id.in_(ids[start:stop])), None)
+            for start, stop in self._chunks("delete", len(ids), parameters_per_row=1)
+        )
+        by_key_statements = (
+            (delete(location_data).where(_matches_removed_keys), {"removed_keys": keys[start:stop]})
+            for start, stop in self._chunks("delete", len(keys))
+        )
+
+        for stmt, parameters in itertools.chain(statements, by_key_statements):
+            if mode == "count":
+                result = await session.execute(_returning(stmt, name="deleted", mode=mode), parameters)
+                removed_count += result.scalar_one()
+            else:
+                result = await session.execute(stmt.returning(returning), parameters)
+                removed_records.extend(result.all())
+
+        return removed_count if mode == "count" else self._records(removed_records, mode)
+
+    async def insert_batch(
+            self,
+            batch: LocationDataBatch,
+            session: AsyncSession,
+            mode: WriteMode = "rows",
+    ) -> LocationDataBatch | array | int:
+        """
+        Insert batch of records, skipping existing identifiers like `insert_many`.
+        Every chunk of the batch is passed as three array parameters to a single
+        ``INSERT ... SELECT FROM unnest(...)`` statement, and inserted records are
+        returned aggregated into arrays. In ids & count modes only ids array or
+        count of inserted records is returned by database.
+
+        :param batch: `LocationDataBatch` instance
+        :param session: `AsyncSession` instance
+        :param mode: Write mode: return inserted rows, their ids or their count only
+        :return: `LocationDataBatch` of actually inserted records, `array` of their ids or their count
+        """
+
+        stmt = _returning(
+            insert(location_data)
+            .from_select(["lac", "cellid", "eci"], select(_inserted_keys))
+            .on_conflict_do_nothing(),
+            name="inserted",
+            mode=mode,
+        )
+
+        inserted = _empty(mode)
+
+        for start, stop in self._chunks("insert", len(batch)):
+            chunk = batch.slice(start, stop)
+            result = await session.execute(
+                stmt,
+                {
+                    "inserted_lac": chunk.column("lac"),
+                    "inserted_cellid": chunk.column("cellid"),
+                    "inserted_eci": chunk.column("eci"),
+                },
+            )
+            inserted = _combine(inserted, _written(result.one(), mode))
+
+        return inserted
+
+    async def delete_batch(
+            self,
+            batch: LocationDataBatch,
+            session: AsyncSession,
+            mode: WriteMode = "rows",
+    ) -> LocationDataBatch | array | int:
+        """
+        Delete batch of records.
+        Records with id are deleted by ``id = ANY(...)`` array parameter, records without id
+        are matched by packed key of their identifier like `delete_many`. Deleted records are returned
+        aggregated into arrays, or only their ids or count are returned like `insert_batch`.
+
+        :param batch: `LocationDataBatch` instance
+        :param session: `AsyncSession` instance
+        :param mode: Write mode: return deleted rows, their ids or their count only
+        :return: `LocationDataBatch` of deleted records, `array` of their ids or their count
+        """
+
+        by_id_stmt = _returning(
+            delete(location_data).where(location_data.c.id == any_(bindparam("deleted_ids", type_=ARRAY(Integer)))),
+            name="deleted",
+            mode=mode,
+        )
+        by_key_stmt = _returning(
+            delete(location_data).where(_matches_removed_keys),
+            name="deleted",
+            mode=mode,
+        )
+
+        with_id = batch.take(index for index, null in enumerate(batch.id_nulls) if not null)
+        without_id = batch.take(index for index, null in enumerate(batch.id_nulls) if null)
+
+        deleted = _empty(mode)
+
+        for start, stop in self._chunks("delete", len(with_id)):
+            result = await session.execute(
+                by_id_stmt,
+                {"deleted_ids": list(with_id.ids[start:stop])},
+            )
+            deleted = _combine(deleted, _written(result.one(), mode))
+
+        for start, stop in self._chunks("delete", len(without_id)):
+            result = await session.execute(
+                by_key_stmt,
+                {"removed_keys": list(without_id.slice(start, stop).packed_keys())},
+            )
+            deleted = _combine(deleted, _written(result.one(), mode))
+
+        return deleted
+
+    async def get_rebuild_blockers(self, session: AsyncSession) -> List[str]:
+        """
+        Get kinds of location_data table properties & dependent objects, that `rebuild_batch`
+        would not carry over to shadow table: privileges, triggers, row security policies, comments,
+        dependent objects (views, foreign keys, etc.), indexes, that are not declared in table metadata,
+        and id column, that is an identity column or has no serial sequence to take inserted ids from.
+
+        :param session: `AsyncSession` instance
+        :return: List of blocker kinds. Empty, if table may be rebuilt
+        """
+
+        result = await session.execute(
+            _rebuild_blockers,
+            {
+                "name": location_data.name,
+                "indexes": [f"{location_data.name}_pkey", *(index.name for index in location_data.indexes)],
+            },
+        )
+
+        return list(result.scalars())
+
+    async def rebuild_batch(
+            self,
+            to_insert: LocationDataBatch,
+            to_delete: LocationDataBatch,
+            session: AsyncSession,
+            mode: WriteMode = "rows",
+    ) -> Tuple[LocationDataBatch | array | int, LocationDataBatch | array | int]:
+        """
+        Rebuilds location_data table with provided changes instead of deleting & inserting
+        records one by one, so that neither table nor its indexes are bloated by heavy churn.
+
+        Within caller's transaction location_data is locked against writes and fresh shadow table
+        is created like it. Surviving records are copied into shadow table server-side, keeping
+        their id & note, and inserted records are loaded with COPY, taking ids from location_data
+        id sequence. Indexes are built after the load, and shadow table replaces location_data
+        atomically on commit. Records to be deleted are matched by their packed keys.
+
+        Privileges, triggers, dependent views & foreign keys of location_data are not carried over,
+        and dependent objects make rebuild fail, so callers should check `get_rebuild_blockers` first.
+        Inserted identifiers must not exist in location_data.
+
+        :param to_insert: `LocationDataBatch` to be inserted
+        :param to_delete: `LocationDataBatch` to be deleted
+        :param session: `AsyncSession` instance within transaction
+        :param mode: Write mode: return inserted & deleted rows, their ids or their counts only
+        :return: Tuple, containing inserted and deleted `LocationDataBatch` instances,
+        `array` of their ids or their counts
+        """
+
+        table = location_data.name
+        shadow = _shadow_location_data.name
+        deleted_keys = {"removed_keys": list(to_delete.packed_keys())}
+
+        await session.execute(text(f"LOCK TABLE {table} IN EXCLUSIVE MODE"))
+        await session.execute(text(f"CREATE TABLE {shadow} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+
+        result = await session.execute(
+            _collect(select(location_data).where(_matches_deleted_keys).subquery("deleted"), mode),
+            deleted_keys,
+        )
+        deleted = _written(result.one(), mode)
+
+        await session.execute(
+            insert(_shadow_location_data).from_select(
+                [column.name for column in location_data.columns],
+                select(location_data).where(~_matches_deleted_keys),
+            ),
+            deleted_keys,
+        )
+
+        result = await session.execute(select(func.pg_get_serial_sequence(table, location_data.c.id.name)))
+        sequence = result.scalar_one()
+        result = await session.execute(
+            select(func.nextval(bindparam("sequence", sequence).cast(REGCLASS)))
+            .select_from(func.generate_series(1, len(to_insert)))
+        )
+        inserted = to_insert.slice(0, len(to_insert))
+        inserted.ids = array("q", result.scalars())
+        inserted.id_nulls = bytearray(len(inserted))
+
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            shadow,
+            records=inserted.rows(),
+            columns=["id", "lac", "cellid", "eci"],
+        )
+
+        await session.execute(text(f"ALTER TABLE {shadow} ADD CONSTRAINT {shadow}_pkey PRIMARY KEY (id)"))
+
+        for index, _name in _shadow_indexes:
+            await session.execute(CreateIndex(index))
+
+        await session.execute(text(f"ANALYZE {shadow}"))
+        await session.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {shadow}.id"))
+        await session.execute(text(f"DROP TABLE {table}"))
+        await session.execute(text(f"ALTER TABLE {shadow} RENAME TO {table}"))
+        await session.execute(text(f"ALTER TABLE {table} RENAME CONSTRAINT {shadow}_pkey TO {table}_pkey"))
+
+        for index, name in _shadow_indexes:
+            await session.execute(text(f"ALTER INDEX {index.name} RENAME TO {name}"))
+
+        if mode == "rows":
+            return inserted, deleted
+
+        return (inserted.ids if mode == "ids" else len(inserted)), deleted
+
+    @staticmethod
+    def _records(records: List[Row], mode: WriteMode) -> List[LocationDataRow] | array | int:
+        """
+        Converts records, returned by insert or delete statements in rows or ids write mode.
+
+        :param records: List of returned rows, containing all columns in rows mode or id column in ids mode
+        :param mode: Write mode
+        :return: List of `LocationDataRow` instances or `array` of ids
+        """
 
-        for batch in batched_ids:
-            stmt = delete(location_data).returning(location_data).where(location_data.c.id.in_(batch))
-            result = await session.execute(stmt)
-            removed_records.extend(result.all())
+        if mode == "rows":
+            return [LocationDataRow(*record) for record in records]
 
-        return [LocationDataRow(*record) for record in removed_records]
+        return array("q", (record[0] for record in records))
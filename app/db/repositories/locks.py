@@ -0,0 +1,94 @@
+"""This module contains advisory locks repository"""
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.repositories.base import LockDBRepository
+
+
+class PostgresLockDBRepository(LockDBRepository):
+    """
+    This repository takes & releases PostgreSQL session-level advisory locks.
+    Locks are identified by (namespace, key) pair of 32-bit integers and are held by
+    database session, that took them, until they are released or session ends,
+    so connection must be dedicated to locking and kept open while locks are needed.
+    """
+
+    async def try_lock(self, namespace: int, key: int, connection: AsyncConnection, shared: bool = False) -> bool:
+        """
+        Try to take advisory lock without waiting.
+
+        :param namespace: Lock namespace
+        :param key: Lock key within namespace
+        :param connection: Dedicated `AsyncConnection` instance
+        :param shared: Whether to take shared lock
+        :return: Whether lock has been taken
+        """
+
+        function = "pg_try_advisory_lock_shared" if shared else "pg_try_advisory_lock"
+        result = await connection.execute(
+            text(f"SELECT {function}(:namespace, :key)"),
+            {"namespace": namespace, "key": key},
+        )
+        return bool(result.scalar_one())
+
+    async def unlock(self, namespace: int, key: int, connection: AsyncConnection, shared: bool = False) -> bool:
+        """
+        Release advisory lock, taken within the same session.
+
+        :param namespace: Lock namespace
+        :param key: Lock key within namespace
+        :param connection: Dedicated `AsyncConnection` instance
+        :param shared: Whether lock is shared
+        :return: Whether lock has been held
+        """
+
+        function = "pg_advisory_unlock_shared" if shared else "pg_advisory_unlock"
+        result = await connection.execute(
+            text(f"SELECT {function}(:namespace, :key)"),
+            {"namespace": namespace, "key": key},
+        )
+        return bool(result.scalar_one())
+
+    async def count_holders(self, namespace: int, key: int, connection: AsyncConnection) -> int:
+        """
+        Count sessions, holding advisory lock, e.g. shared membership lock.
+
+        :param namespace: Lock namespace
+        :param key: Lock key within namespace
+        :param connection: `AsyncConnection` instance
+        :return: Number of sessions, holding the lock
+        """
+
+        result = await connection.execute(
+            text(
+                "SELECT count(DISTINCT pid) FROM pg_locks "
+                "WHERE locktype = 'advisory' AND granted AND objsubid = 2 "
+                "AND classid = CAST(:namespace AS oid) AND objid = CAST(:key AS oid)"
+            ),
+            {"namespace": namespace & 0xFFFFFFFF, "key": key & 0xFFFFFFFF},
+        )
+        return int(result.scalar_one())
+
+    async def set_lease(self, seconds: float, connection: AsyncConnection):
+        """
+        Make server terminate locking session, if it stays idle longer than lease,
+        e.g. because its process hangs, so that its locks are released (PostgreSQL 14+).
+
+        :param seconds: Lease duration in seconds
+        :param connection: Dedicated `AsyncConnection` instance
+        """
+
+        await connection.execute(
+            text("SELECT set_config('idle_session_timeout', :timeout, false)"),
+            {"timeout": str(int(seconds * 1000))},
+        )
+
+    async def ping(self, connection: AsyncConnection):
+        """
+        Execute trivial statement, checking that locking session is alive & renewing its lease.
+
+        :param connection: Dedicated `AsyncConnection` instance
+        """
+
+        await connection.execute(text("SELECT 1"))
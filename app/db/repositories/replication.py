@@ -0,0 +1,52 @@
+"""This module contains replication status repository"""
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.repositories.base import ReplicationDBRepository
+
+
+class PostgresReplicationDBRepository(ReplicationDBRepository):
+    """
+    This repository reads WAL position & replication lag of PostgreSQL server.
+    Lag is read from `pg_stat_replication` of the primary, so it is zero
+    for a standalone server, e.g. a local stand-in. Replay position is read
+    from a standby server, and it is unknown for a server, that is not in recovery.
+    """
+
+    async def get_wal_position(self, session: AsyncSession) -> int:
+        """
+        Get current WAL write position.
+
+        :param session: `AsyncSession` instance
+        :return: WAL position in bytes
+        """
+
+        result = await session.execute(text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), '0/0')"))
+        return int(result.scalar_one())
+
+    async def get_replay_position(self, session: AsyncSession) -> int | None:
+        """
+        Get WAL position, replayed by standby server.
+
+        :param session: `AsyncSession` instance, bound to standby server
+        :return: WAL position in bytes or None, if server is not in recovery
+        """
+
+        result = await session.execute(text("SELECT pg_wal_lsn_diff(pg_last_wal_replay_lsn(), '0/0')"))
+        position = result.scalar_one()
+
+        return None if position is None else int(position)
+
+    async def get_replication_lag(self, session: AsyncSession) -> float:
+        """
+        Get maximum replay lag among connected replicas.
+
+        :param session: `AsyncSession` instance
+        :return: Replay lag in seconds
+        """
+
+        result = await session.execute(
+            text("SELECT COALESCE(MAX(EXTRACT(EPOCH FROM replay_lag)), 0) FROM pg_stat_replication")
+        )
+        return float(result.scalar_one())
@@ -0,0 +1,41 @@
+"""This module contains synchronizer state repository"""
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.repositories.base import StateDBRepository
+from app.db.tables import sync_state
+
+
+class SyncStateDBRepository(StateDBRepository):
+    """
+    SyncState repository stores named synchronizer state values, e.g. change feed cursor.
+    Values are written within caller's transaction, so they are committed atomically
+    with data changes they describe.
+    """
+
+    async def get(self, name: str, session: AsyncSession) -> str | None:
+        """
+        Get state value by its name.
+
+        :param name: State value name
+        :param session: `AsyncSession` instance
+        :return: State value or None, if it is not set
+        """
+
+        result = await session.execute(select(sync_state.c.value).where(sync_state.c.name == name))
+        return result.scalar_one_or_none()
+
+    async def set(self, name: str, value: str | None, session: AsyncSession):
+        """
+        Insert or update state value.
+
+        :param name: State value name
+        :param value: State value
+        :param session: `AsyncSession` instance
+        """
+
+        stmt = insert(sync_state).values(name=name, value=value)
+        stmt = stmt.on_conflict_do_update(index_elements=[sync_state.c.name], set_={"value": stmt.excluded.value})
+        await session.execute(stmt)
@@ -1,22 +1,31 @@
-"""This module provides async session fabric"""
+"""This module provides async engine & session fabrics"""
 
 from sqlalchemy.engine import URL
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 
 
-def create_sessionmaker(engine_url: URL) -> async_sessionmaker:
+def create_engine(engine_url: URL) -> AsyncEngine:
     """
-    Creates async engine with provided URL and async sessionmaker with created engine.
+    Creates async engine with provided URL.
 
     :param engine_url: DB engine URL
-    :return: `async_sessionmaker` instance
+    :return: `AsyncEngine` instance
     """
 
-    engine = create_async_engine(
+    return create_async_engine(
         url=engine_url
     )
 
+
+def create_sessionmaker(engine: AsyncEngine) -> async_sessionmaker:
+    """
+    Creates async sessionmaker with provided engine.
+
+    :param engine: `AsyncEngine` instance
+    :return: `async_sessionmaker` instance
+    """
+
     return async_sessionmaker(
         autocommit=False,
         autoflush=False,
@@ -24,3 +33,14 @@ def create_sessionmaker(engine_url: URL) -> async_sessionmaker:
         class_=AsyncSession,
         expire_on_commit=False
     )
+
+
+async def connect(engine: AsyncEngine):
+    """
+    Opens DB connection, so that connection pool is ready before the first synchronization.
+
+    :param engine: `AsyncEngine` instance
+    """
+
+    async with engine.connect():
+        pass
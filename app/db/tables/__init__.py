@@ -1,3 +1,5 @@
 """This package contains DB tables"""
 
-from app.db.tables.location_data import location_data, LocationDataRow
+from app.db.tables.base import metadata
+from app.db.tables.location_data import location_data, location_data_packed_key, LocationDataRow
+from app.db.tables.sync_state import sync_state
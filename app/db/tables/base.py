@@ -0,0 +1,5 @@
+"""This module contains tables `MetaData` instance shared by all table declarations"""
+
+from sqlalchemy import MetaData
+
+metadata = MetaData()
@@ -6,12 +6,18 @@ from sqlalchemy import (
     Table,
     Column,
     Integer,
+    BigInteger,
     String,
     CheckConstraint,
-    MetaData
+    Index,
+    case,
+    func,
+    literal_column,
 )
+from sqlalchemy.sql.expression import Grouping
 
-metadata = MetaData()
+from app.db.tables.base import metadata
+from app.utils.keys import ECI_OFFSET, NO_CELLID
 
 location_data = Table(
     'location_data',
@@ -26,9 +32,33 @@ location_data = Table(
         '(lac IS NOT NULL AND eci IS NULL) OR '
         '(lac IS NULL AND cellid IS NULL AND eci IS NOT NULL)',
         name='valid_combination_check'
-    )
+    ),
+
+    Index(
+        'location_data_identifier_key',
+        'lac', 'cellid', 'eci',
+        unique=True,
+        postgresql_nulls_not_distinct=True,
+    ),
+)
+
+# Packed key of location identifier, see `app.utils.keys.pack_key`. Constants are rendered inline,
+# so that queries, filtering by this expression, match `location_data_packed_key` index expression.
+location_data_packed_key = case(
+    (
+        location_data.c.eci.is_not(None),
+        location_data.c.eci.cast(BigInteger) + literal_column(str(ECI_OFFSET), BigInteger),
+    ),
+    else_=(
+        location_data.c.lac.cast(BigInteger) * literal_column(str(0x10000), BigInteger)
+        + func.coalesce(location_data.c.cellid, literal_column(str(NO_CELLID), BigInteger))
+    ),
 )
 
+# Expression is grouped, since PostgreSQL requires parentheses around index expressions other than
+# function calls
+location_data.append_constraint(Index('location_data_packed_key', Grouping(location_data_packed_key)))
+
 
 class LocationDataRow(NamedTuple):
     """This class describes location_data table row type"""
@@ -0,0 +1,16 @@
+"""This module contains `sync_state` table declaration"""
+
+from sqlalchemy import (
+    Table,
+    Column,
+    String,
+)
+
+from app.db.tables.base import metadata
+
+sync_state = Table(
+    'sync_state',
+    metadata,
+    Column('name', String(64), primary_key=True),
+    Column('value', String, nullable=True),
+)
@@ -1,58 +1,287 @@
-"""This module is an application entry point"""
+"""
+This module is an application entry point.
+
+Heavy modules (pydantic, SQLAlchemy, aiohttp, APScheduler) are not imported at module level,
+but by the startup stage, that uses them first, so that their import time is included
+into that stage's duration and one-shot runs do not import the scheduler.
+"""
+
+from __future__ import annotations
 
 import argparse
 import asyncio
+import logging
+import os
+import signal
+import sys
 
-from app.config import AppConfiguration, get_app_configuration
+from typing import TYPE_CHECKING
 
-from app.api.client import LocationDataAPIClient
-from app.services.api import LocationDataAPIService
+from app.utils.logger import create_queue_logger, flush_queue_logger
+from app.utils.startup import StartupReport
 
-from app.db.session import create_sessionmaker
-from app.db.repositories import LocationDataDBRepository
-from app.services.db import LocationDataDBService
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
 
-from app.core import LocationDataSynchronizerApp
-from app.core.events import EventManager
+    from app.config import AppConfiguration
+    from app.core import LocationDataSynchronizerApp
+    from app.core.reconciliation import ReconciliationStrategy
 
-from app.utils.event_logger import EventLogger
-from app.utils.logger import create_queue_logger
+EXIT_OK = 0
+EXIT_FAILURE = 1
 
 
-def configure_app(app_conf: AppConfiguration) -> LocationDataSynchronizerApp:
+def configure_strategy(app_conf: AppConfiguration) -> ReconciliationStrategy:
+    """
+    Creates reconciliation strategy, selected in configuration.
+
+    :param app_conf: `AppConfiguration` instance
+    :return: `ReconciliationStrategy` instance
+    """
+
+    from app.core.reconciliation import FullReconciliation, ChecksumReconciliation, SnapshotReconciliation
+
+    if app_conf.RECONCILIATION_STRATEGY == "checksum":
+        return ChecksumReconciliation(buckets=app_conf.RECONCILIATION_BUCKETS)
+
+    if app_conf.RECONCILIATION_STRATEGY == "snapshot":
+        return SnapshotReconciliation(path=app_conf.SNAPSHOT_PATH)
+
+    return FullReconciliation()
+
+
+def configure_app(
+        app_conf: AppConfiguration,
+        engine: AsyncEngine,
+        session: async_sessionmaker,
+        config_dir: str = "",
+        read_session: async_sessionmaker | None = None,
+) -> LocationDataSynchronizerApp:
     """
     Creates required services instances and configures app.
 
     :param app_conf: `AppConfiguration` instance
+    :param engine: `AsyncEngine` instance, session is bound to
+    :param session: `async_sessionmaker` instance
+    :param config_dir: Configuration file directory, profiling flag file is looked up in
+    :param read_session: Optional `async_sessionmaker` instance, bound to replica
     :return: `LocationDataSynchronizerApp` instance.
     """
 
+    from app.api.client import LocationDataAPIClient
+    from app.services.api import LocationDataAPIService
+
+    from app.db.repositories import (
+        LocationDataDBRepository,
+        SyncStateDBRepository,
+        PostgresReplicationDBRepository,
+        PostgresLockDBRepository,
+    )
+    from app.services.db import LocationDataDBService, WriteThrottle, CoordinationDBService
+
+    from app.core import LocationDataSynchronizerApp
+    from app.core.journal import SyncJournal
+    from app.utils.memory import MemoryMonitor, MemoryBudget
+    from app.utils.profiling import CycleProfiler
+    from app.utils.batching import AdaptiveBatcher
+
+    incremental = app_conf.LOCATION_DATA_CHANGES_ENDPOINT_URL is not None
+
     api_client = LocationDataAPIClient(
         url=str(app_conf.LOCATION_DATA_ENDPOINT_URL),
         login=app_conf.AUTH_LOGIN,
-        password=app_conf.AUTH_PASSWORD.get_secret_value()
+        password=app_conf.AUTH_PASSWORD.get_secret_value(),
+        changes_url=str(app_conf.LOCATION_DATA_CHANGES_ENDPOINT_URL) if incremental else None,
+        mirror_urls=[str(url) for url in app_conf.API_MIRROR_URLS],
+        connect_timeout=app_conf.API_CONNECT_TIMEOUT,
+        first_byte_timeout=app_conf.API_FIRST_BYTE_TIMEOUT,
+        total_timeout=app_conf.API_TOTAL_TIMEOUT,
+        hedge_after=app_conf.API_HEDGE_AFTER,
     )
 
     api_service = LocationDataAPIService(client=api_client)
 
-    session = create_sessionmaker(app_conf.engine_url)
+    throttle = None
+
+    if app_conf.DB_WRITE_CHUNK_SIZE is not None:
+        throttle = WriteThrottle(
+            chunk_size=app_conf.DB_WRITE_CHUNK_SIZE,
+            rows_per_second=app_conf.DB_WRITE_ROWS_PER_SECOND,
+            wal_bytes_per_second=app_conf.DB_WRITE_WAL_BYTES_PER_SECOND,
+            max_replication_lag=app_conf.DB_MAX_REPLICATION_LAG,
+        )
+
+    batcher = None
+
+    if app_conf.DB_BATCH_TARGET_DURATION is not None:
+        batcher = AdaptiveBatcher(
+            target_duration=app_conf.DB_BATCH_TARGET_DURATION,
+            initial_size=min(max(10_000, app_conf.DB_BATCH_MIN_SIZE), app_conf.DB_BATCH_MAX_SIZE),
+            min_size=app_conf.DB_BATCH_MIN_SIZE,
+            max_size=app_conf.DB_BATCH_MAX_SIZE,
+        )
 
     db_service = LocationDataDBService(
         session=session,
-        db_repository=LocationDataDBRepository()
+        db_repository=LocationDataDBRepository(batcher=batcher),
+        state_repository=SyncStateDBRepository(),
+        throttle=throttle,
+        replication_repository=PostgresReplicationDBRepository(),
+        batcher=batcher,
+        write_mode=app_conf.DB_WRITE_MODE,
+        checkpoint_size=app_conf.SYNC_CHECKPOINT_SIZE,
+        read_session=read_session,
+        replica_standin=app_conf.POSTGRES_REPLICA_STANDIN,
     )
 
-    app = LocationDataSynchronizerApp(api_service=api_service, db_service=db_service)
+    coordinator = None
+
+    if app_conf.COORDINATION_MODE != "none":
+        coordinator = CoordinationDBService(
+            lock_repository=PostgresLockDBRepository(),
+            engine=engine,
+            shards=app_conf.COORDINATION_SHARDS if app_conf.COORDINATION_MODE == "sharded" else None,
+            lease=app_conf.COORDINATION_LEASE,
+        )
+
+    app = LocationDataSynchronizerApp(
+        api_service=api_service,
+        db_service=db_service,
+        strategy=configure_strategy(app_conf),
+        incremental=incremental,
+        memory_monitor=MemoryMonitor(trace=app_conf.MEMORY_TRACING),
+        memory_budget=MemoryBudget(app_conf.MEMORY_BUDGET) if app_conf.MEMORY_BUDGET is not None else None,
+        profiler=CycleProfiler(
+            directory=app_conf.PROFILE_DIR,
+            cycles=app_conf.PROFILE_CYCLES,
+            flag_path=os.path.join(config_dir, app_conf.PROFILE_FLAG_FILE),
+        ),
+        coordinator=coordinator,
+        journal=SyncJournal(app_conf.SYNC_JOURNAL_PATH) if app_conf.SYNC_JOURNAL_PATH is not None else None,
+        rebuild_ratio=app_conf.DB_REBUILD_RATIO,
+    )
 
     return app
 
 
+def subscribe_event_logger(logger: logging.Logger):
+    """
+    Subscribes `EventLogger` methods on app events.
+
+    :param logger: `Logger` instance
+    """
+
+    from app.core.events import EventManager
+    from app.utils.event_logger import EventLogger
+
+    event_logger = EventLogger(logger)
+
+    EventManager.events["fetch_location_data_api"].subscribe(event_logger.log_fetch_location_data_api)
+    EventManager.events["fetch_location_data_changes_api"].subscribe(
+        event_logger.log_fetch_location_data_changes_api
+    )
+    EventManager.events["sync_db"].subscribe(event_logger.log_sync_db)
+    EventManager.events["sync_memory"].subscribe(event_logger.log_sync_memory)
+    EventManager.events["acquire_leadership"].subscribe(event_logger.log_acquire_leadership)
+    EventManager.events["claim_shards"].subscribe(event_logger.log_claim_shards)
+    EventManager.events["sync_plan"].subscribe(event_logger.log_sync_plan)
+    EventManager.events["check_replica"].subscribe(event_logger.log_check_replica)
+    EventManager.events["check_rebuild"].subscribe(event_logger.log_check_rebuild)
+
+
+async def run_once(
+        app: LocationDataSynchronizerApp,
+        engine: AsyncEngine,
+        report: StartupReport,
+        logger: logging.Logger,
+        read_engine: AsyncEngine | None = None,
+) -> int:
+    """
+    Connects to DB, logs startup report & synchronizes location data once.
+
+    :param app: `LocationDataSynchronizerApp` instance
+    :param engine: `AsyncEngine` instance
+    :param report: `StartupReport` instance
+    :param logger: `Logger` instance
+    :param read_engine: Optional `AsyncEngine` instance, bound to replica
+    :return: Process exit code
+    """
+
+    from app.db.session import connect
+
+    try:
+        with report.stage("connect"):
+            await connect(engine)
+
+            if read_engine is not None:
+                await connect(read_engine)
+
+        report.log(logger)
+
+        await app.sync_once()
+    except Exception:
+        logger.exception("Location data synchronization failed")
+        return EXIT_FAILURE
+    finally:
+        await app.shutdown()
+        await engine.dispose()
+
+        if read_engine is not None:
+            await read_engine.dispose()
+
+    logger.info("Location data synchronization finished")
+    return EXIT_OK
+
+
+async def run_scheduled(
+        app: LocationDataSynchronizerApp,
+        app_conf: AppConfiguration,
+        engine: AsyncEngine,
+        report: StartupReport,
+        logger: logging.Logger,
+        read_engine: AsyncEngine | None = None,
+):
+    """
+    Connects to DB, logs startup report & runs app in scheduled mode.
+    SIGUSR1 signal arms profiling of the next synchronization cycles.
+
+    :param app: `LocationDataSynchronizerApp` instance
+    :param app_conf: `AppConfiguration` instance
+    :param engine: `AsyncEngine` instance
+    :param report: `StartupReport` instance
+    :param logger: `Logger` instance
+    :param read_engine: Optional `AsyncEngine` instance, bound to replica
+    """
+
+    from app.db.session import connect
+
+    with report.stage("connect"):
+        await connect(engine)
+
+        if read_engine is not None:
+            await connect(read_engine)
+
+    report.log(logger)
+
+    if hasattr(signal, "SIGUSR1"):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, app.arm_profiler)
+
+    try:
+        await app.run_scheduled(crontab=app_conf.SCHEDULE, reconciliation_crontab=app_conf.RECONCILIATION_SCHEDULE)
+    finally:
+        await app.shutdown()
+
+
 def main():
     """
     Creates app and configures additional handlers.
     Runs app in scheduled mode inside asyncio event loop.
+    With `--once` flag synchronizes location data once and exits with
+    non-zero code, if synchronization failed.
     """
 
+    report = StartupReport()
+
     parser = argparse.ArgumentParser(description="Location data synchronizer service")
     parser.add_argument(
         "configfile",
@@ -61,20 +290,55 @@ def main():
         default=".env",
         help="Path to application configuration file (default: .env)"
     )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Synchronize location data once and exit (e.g. when triggered by external scheduler)"
+    )
 
     args = parser.parse_args()
 
-    app_conf = get_app_configuration(args.configfile)
+    app_logger = create_queue_logger("app")
 
-    app = configure_app(app_conf=app_conf)
+    # Heavy modules are imported within the stage, that uses them first
+    with report.stage("config"):
+        from app.config import get_app_configuration
 
-    app_logger = create_queue_logger("app")
-    event_logger = EventLogger(app_logger)
+        app_conf = get_app_configuration(args.configfile)
 
-    EventManager.events["fetch_location_data_api"].subscribe(event_logger.log_fetch_location_data_api)
-    EventManager.events["sync_db"].subscribe(event_logger.log_sync_db)
+    with report.stage("configure"):
+        from app.db.session import create_engine, create_sessionmaker
+
+        engine = create_engine(app_conf.engine_url)
+        read_engine = create_engine(app_conf.replica_engine_url) if app_conf.replica_engine_url is not None else None
+        session = create_sessionmaker(engine)
+        read_session = create_sessionmaker(read_engine) if read_engine is not None else None
+        app = configure_app(
+            app_conf=app_conf,
+            engine=engine,
+            session=session,
+            config_dir=os.path.dirname(os.path.abspath(args.configfile)),
+            read_session=read_session,
+        )
+        subscribe_event_logger(app_logger)
 
-    asyncio.run(app.run_scheduled(crontab=app_conf.SCHEDULE))
+    if args.once:
+        exit_code = asyncio.run(
+            run_once(app=app, engine=engine, report=report, logger=app_logger, read_engine=read_engine)
+        )
+        flush_queue_logger("app")
+        sys.exit(exit_code)
+
+    asyncio.run(
+        run_scheduled(
+            app=app,
+            app_conf=app_conf,
+            engine=engine,
+            report=report,
+            logger=app_logger,
+            read_engine=read_engine,
+        )
+    )
 
 
 if __name__ == '__main__':
@@ -1,8 +1,10 @@
 """This module contains APIService class"""
 
-from typing import Generic, TypeVar, List
+from typing import Generic, TypeVar, List, Tuple
 from abc import ABC, abstractmethod
 
+from app.core.batch import LocationDataBatch
+
 T = TypeVar("T")
 
 
@@ -12,3 +14,11 @@ class APIService(ABC, Generic[T]):
     @abstractmethod
     async def get(self) -> List[T]:
         pass
+
+    @abstractmethod
+    async def get_batch(self) -> LocationDataBatch:
+        pass
+
+    @abstractmethod
+    async def get_changes(self, cursor: str | None) -> Tuple[List[T], List[T], str]:
+        pass
@@ -1,11 +1,14 @@
 """This module contains APIRepository class"""
 
-from typing import List
+from typing import List, Tuple, Iterable
 
 from app.api import APIClient
+from app.api.response import LocationDataResponse
 from app.services.api import APIService
-from app.core.models import LocationData
+from app.core.batch import LocationDataBatch
+from app.core.models import LocationData, is_identifier_valid
 from app.core.events import EventManager
+from app.utils.latency import LatencyStats
 
 
 class LocationDataAPIService(APIService[LocationData]):
@@ -23,25 +26,116 @@ class LocationDataAPIService(APIService[LocationData]):
 
         self._client = client
 
-    @EventManager.event("fetch_location_data_api")
+    @property
+    def latency(self) -> LatencyStats | None:
+        """Latency percentiles of the last location data fetches, recorded by API client"""
+
+        return self._client.latency
+
+    @EventManager.event("fetch_location_data_api", details=lambda service: {"latency": service.latency})
     async def get(self) -> List[LocationData]:
         """
         Requests location data from API client & validates response.
-        Skips invalid location identifiers.
+        Skips invalid & duplicate location identifiers.
 
         :return: List of valid `LocationData` instances
         """
 
         location_data = await self._client.get()
 
+        return self._validate(location_data)
+
+    @EventManager.event("fetch_location_data_api", details=lambda service: {"latency": service.latency})
+    async def get_batch(self) -> LocationDataBatch:
+        """
+        Requests location data from API client & validates response into columnar batch
+        without creating `LocationData` instance per valid integer identifier.
+        Identifiers, failing the fast check, are validated by `LocationData` model like in `get`,
+        so that values are coerced the same way (e.g. "123" or 5.0).
+        Skips invalid & duplicate location identifiers.
+
+        :return: `LocationDataBatch` of valid location identifiers
+        """
+
+        location_data = await self._client.get()
+
+        batch = LocationDataBatch()
+        seen = set()
+
+        for identifier in location_data:
+            lac, cellid, eci = identifier
+
+            if not is_identifier_valid(lac, cellid, eci):
+                try:
+                    location_identifier = LocationData.model_validate(identifier)
+                except ValueError:
+                    continue
+
+                lac, cellid, eci = location_identifier.lac, location_identifier.cellid, location_identifier.eci
+
+            key = (lac, cellid, eci)
+
+            if key in seen:
+                continue
+
+            seen.add(key)
+            batch.append(None, lac, cellid, eci)
+
+        return batch
+
+    @EventManager.event("fetch_location_data_changes_api")
+    async def get_changes(self, cursor: str | None) -> Tuple[List[LocationData], List[LocationData], str]:
+        """
+        Requests location data changes since provided cursor from API client & validates response.
+        Skips invalid & duplicate location identifiers.
+
+        Changes response does not order additions & removals, so identifiers, that are both added
+        and removed within one response, are dropped from both lists instead of being inserted
+        and then deleted. Their actual state is restored by the next full reconciliation.
+
+        :param cursor: Cursor, returned by previous call, or None to get current cursor
+        :return: Tuple, containing list of added and list of removed valid `LocationData` instances
+        and new cursor
+        :raises CursorRejectedError: If API rejected provided cursor
+        """
+
+        changes = await self._client.get_changes(cursor)
+
+        added = self._validate(changes.added)
+        removed = self._validate(changes.removed)
+
+        overlap = {(data.lac, data.cellid, data.eci) for data in added}
+        overlap.intersection_update((data.lac, data.cellid, data.eci) for data in removed)
+
+        if overlap:
+            added = [data for data in added if (data.lac, data.cellid, data.eci) not in overlap]
+            removed = [data for data in removed if (data.lac, data.cellid, data.eci) not in overlap]
+
+        return added, removed, changes.cursor
+
+    @staticmethod
+    def _validate(location_data: Iterable[LocationDataResponse]) -> List[LocationData]:
+        """
+        Validates location identifiers, skipping invalid ones.
+        Keeps only the first occurrence of every (lac, cellid, eci) identifier.
+
+        :param location_data: Iterable of `LocationDataResponse` instances
+        :return: List of valid unique `LocationData` instances
+        """
+
         location_identifiers = []
+        seen = set()
 
         for identifier in location_data:
             try:
                 location_identifier = LocationData.model_validate(identifier)
             except ValueError:
                 continue
-            else:
+
+            key = (location_identifier.lac, location_identifier.cellid, location_identifier.eci)
+
+            if key not in seen:
+                seen.add(key)
                 location_identifiers.append(location_identifier)
 
         return location_identifiers
@@ -2,3 +2,5 @@
 
 from app.services.db.base import DBService
 from app.services.db.location_data import LocationDataDBService
+from app.services.db.throttle import WriteThrottle
+from app.services.db.coordination import CoordinationDBService
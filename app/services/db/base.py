@@ -1,8 +1,11 @@
 """This module contains DBService class"""
 
-from typing import Generic, TypeVar, List, Tuple
+from typing import Generic, TypeVar, List, Tuple, Dict, Iterable
 from abc import ABC, abstractmethod
 
+from app.core.batch import LocationDataBatch, WriteSummary
+from app.utils.keys import BucketChecksum
+
 T = TypeVar("T")
 
 
@@ -14,5 +17,61 @@ class DBService(ABC, Generic[T]):
         pass
 
     @abstractmethod
-    async def sync_db(self, to_insert: List[T], to_delete: List[T]) -> Tuple[List[T], List[T]]:
+    async def get_batch(self) -> LocationDataBatch:
+        pass
+
+    @abstractmethod
+    async def get_batch_by_buckets(self, bucket_ids: Iterable[int], buckets: int) -> LocationDataBatch:
+        pass
+
+    @abstractmethod
+    async def get_batch_by_key_range(self, start: int | None, stop: int | None) -> LocationDataBatch:
+        pass
+
+    @abstractmethod
+    async def get_count_estimate(self) -> int:
+        pass
+
+    @abstractmethod
+    async def get_bucket_checksums(self, buckets: int) -> Dict[int, BucketChecksum]:
+        pass
+
+    @abstractmethod
+    async def get_snapshot_checksum(self) -> BucketChecksum:
+        pass
+
+    @abstractmethod
+    async def get_cursor(self) -> str | None:
+        pass
+
+    @abstractmethod
+    async def sync_db(
+            self,
+            to_insert: List[T],
+            to_delete: List[T],
+            cursor: str | None = None,
+    ) -> Tuple[List[T], List[T]] | WriteSummary:
+        pass
+
+    @abstractmethod
+    async def sync_db_batch(
+            self,
+            to_insert: LocationDataBatch,
+            to_delete: LocationDataBatch,
+            cursor: str | None = None,
+            checkpoint: str | None = None,
+    ) -> Tuple[LocationDataBatch, LocationDataBatch] | WriteSummary:
+        pass
+
+    @abstractmethod
+    async def get_rebuild_blockers(self) -> List[str]:
+        pass
+
+    @abstractmethod
+    async def rebuild_db_batch(
+            self,
+            to_insert: LocationDataBatch,
+            to_delete: LocationDataBatch,
+            cursor: str | None = None,
+    ) -> Tuple[LocationDataBatch, LocationDataBatch] | WriteSummary:
         pass
@@ -0,0 +1,244 @@
+"""This module contains CoordinationDBService class"""
+
+import asyncio
+import math
+import random
+import zlib
+
+from typing import List
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncConnection
+
+from app.db.repositories import LockDBRepository
+from app.core.events import EventManager
+
+_LOCK_NAMESPACE = zlib.crc32(b"location_data_synchronizer") & 0x7FFFFFFF
+_LEADER_KEY = -1
+_MEMBER_KEY = -2
+
+
+class CoordinationDBService:
+    """
+    This class coordinates synchronizer replicas, sharing one database, with advisory locks.
+
+    In leader mode the only replica, holding leader lock, synchronizes location data.
+    In sharded mode packed keys space is split into shards (packed key modulo shards count),
+    every replica holds shared membership lock, and claims its fair share of shards,
+    calculated from the number of members, by taking shard locks. Shards of stopped
+    replicas are claimed by the others on their next cycle.
+
+    Locks are held by dedicated connection. They are released on `release` call or when
+    connection ends: on process exit or when lease expires, i.e. server terminates the
+    connection, which has not been renewed by heartbeat within lease duration.
+    """
+
+    def __init__(
+            self,
+            lock_repository: LockDBRepository,
+            engine: AsyncEngine,
+            shards: int | None = None,
+            lease: float = 60.0,
+    ):
+        """
+        Construct.
+
+        :param lock_repository: Concrete `LockDBRepository` instance
+        :param engine: `AsyncEngine` instance, providing dedicated connection
+        :param shards: Shards count, enabling sharded mode. Leader mode is used by default
+        :param lease: Lease duration in seconds
+        """
+
+        if shards is not None and shards <= 0:
+            raise ValueError("Shards count must be positive")
+
+        self._lock_repository = lock_repository
+        self._engine = engine
+        self._shards = shards
+        self._lease = lease
+
+        self._connection: AsyncConnection | None = None
+        self._connection_lock = asyncio.Lock()
+        self._heartbeat: asyncio.Task | None = None
+        self._is_leader = False
+        self._claimed: List[int] = []
+        self._offset = random.randrange(shards) if shards else 0
+
+    @property
+    def sharded(self) -> bool:
+        """Whether replicas share location data by shards"""
+
+        return self._shards is not None
+
+    @property
+    def shards(self) -> int:
+        """Shards count, 1 in leader mode"""
+
+        return self._shards or 1
+
+    @EventManager.event("acquire_leadership")
+    async def acquire_leadership(self) -> bool:
+        """
+        Take leader lock, unless it is already held by this replica.
+
+        :return: Whether this replica is the leader
+        """
+
+        async with self._connection_lock:
+            connection = await self._connect()
+
+            if not self._is_leader:
+                self._is_leader = await self._lock_repository.try_lock(_LOCK_NAMESPACE, _LEADER_KEY, connection)
+
+            return self._is_leader
+
+    @EventManager.event("claim_shards")
+    async def claim_shards(self) -> List[int]:
+        """
+        Adjusts claimed shards to fair share: releases excess shards, if replicas have joined,
+        and claims free shards, if replicas have left or this replica has not claimed its share yet.
+
+        :return: Sorted list of claimed shard numbers
+        """
+
+        async with self._connection_lock:
+            connection = await self._connect()
+
+            members = await self._lock_repository.count_holders(_LOCK_NAMESPACE, _MEMBER_KEY, connection)
+            share = math.ceil(self._shards / max(1, members))
+
+            while len(self._claimed) > share:
+                await self._lock_repository.unlock(_LOCK_NAMESPACE, self._claimed.pop(), connection)
+
+            for step in range(self._shards):
+                if len(self._claimed) >= share:
+                    break
+
+                shard = (self._offset + step) % self._shards
+
+                if shard in self._claimed:
+                    continue
+
+                if await self._lock_repository.try_lock(_LOCK_NAMESPACE, shard, connection):
+                    self._claimed.append(shard)
+
+            return sorted(self._claimed)
+
+    async def verify(self):
+        """
+        Checks that locking connection is alive, so that held locks are still valid.
+
+        :raises Exception: If connection has been lost. Held locks are forgotten
+        """
+
+        async with self._connection_lock:
+            if self._connection is None:
+                raise ConnectionError("Coordination locks are not held")
+
+            try:
+                await self._lock_repository.ping(self._connection)
+            except Exception:
+                await self._drop()
+                raise
+
+    async def release(self):
+        """
+        Releases all held locks & closes locking connection.
+        Unlock errors are ignored, since locks are released with connection anyway.
+        """
+
+        async with self._connection_lock:
+            if self._connection is None:
+                return
+
+            try:
+                for shard in self._claimed:
+                    await self._lock_repository.unlock(_LOCK_NAMESPACE, shard, self._connection)
+
+                if self._is_leader:
+                    await self._lock_repository.unlock(_LOCK_NAMESPACE, _LEADER_KEY, self._connection)
+
+                if self.sharded:
+                    await self._lock_repository.unlock(_LOCK_NAMESPACE, _MEMBER_KEY, self._connection, shared=True)
+            except Exception:
+                pass
+            finally:
+                await self._drop()
+
+    async def _connect(self) -> AsyncConnection:
+        """
+        Opens dedicated locking connection, if it is not open or has been lost,
+        sets its lease, takes membership lock in sharded mode & starts heartbeat.
+
+        :return: `AsyncConnection` instance
+        """
+
+        if self._connection is not None:
+            try:
+                await self._lock_repository.ping(self._connection)
+                return self._connection
+            except Exception:
+                await self._drop()
+
+        connection = await self._engine.connect()
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+
+        try:
+            await self._lock_repository.set_lease(self._lease, connection)
+
+            if self.sharded:
+                await self._lock_repository.try_lock(_LOCK_NAMESPACE, _MEMBER_KEY, connection, shared=True)
+        except Exception:
+            await self._discard(connection)
+            raise
+
+        self._connection = connection
+        self._heartbeat = asyncio.create_task(self._renew())
+
+        return connection
+
+    async def _renew(self):
+        """Renews lease of locking connection until connection is lost"""
+
+        while True:
+            await asyncio.sleep(self._lease / 3)
+
+            async with self._connection_lock:
+                try:
+                    await self._lock_repository.ping(self._connection)
+                except Exception:
+                    await self._drop(heartbeat=False)
+                    return
+
+    async def _drop(self, heartbeat: bool = True):
+        """
+        Forgets held locks, stops heartbeat & discards locking connection.
+
+        :param heartbeat: Whether to cancel heartbeat task
+        """
+
+        connection, self._connection = self._connection, None
+        self._is_leader = False
+        self._claimed = []
+
+        if heartbeat and self._heartbeat is not None:
+            self._heartbeat.cancel()
+
+        self._heartbeat = None
+
+        if connection is not None:
+            await self._discard(connection)
+
+    @staticmethod
+    async def _discard(connection: AsyncConnection):
+        """
+        Invalidates & closes locking connection, so that connection with lease timeout
+        or advisory locks, that may be still held, is not returned to connection pool.
+
+        :param connection: `AsyncConnection` instance
+        """
+
+        try:
+            await connection.invalidate()
+            await connection.close()
+        except Exception:
+            pass
@@ -1,35 +1,95 @@
 """This module contains LocationDataDBService class"""
 
-from typing import List, Tuple
+import time
+
+from array import array
+from typing import List, Tuple, Dict, Iterable
 
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from app.db.repositories import DBRepository
+from app.db.repositories import DBRepository, StateDBRepository, ReplicationDBRepository, WriteMode
 from app.db.tables import LocationDataRow
 from app.services.db.base import DBService
+from app.services.db.throttle import WriteThrottle
+from app.utils.batching import AdaptiveBatcher, BatchingStats
+from app.utils.keys import BucketChecksum
+from app.core.batch import LocationDataBatch, WriteSummary
 from app.core.models import LocationData
 from app.core.events import EventManager
 
+_CURSOR_STATE_NAME = "location_data_cursor"
+_CHECKPOINT_STATE_NAME = "location_data_checkpoint"
+
 
 class LocationDataDBService(DBService[LocationData]):
     """
     This class is a layer between business logic and SQLAlchemy actions & database repository.
+
+    If read session is provided, location data is selected from replica, while writes, cursor
+    & checkpoints stay on the primary. WAL position of the primary is recorded after every write,
+    and replica is used only if it has replayed that position, otherwise location data is
+    selected from the primary. Before the first write current WAL position of the primary is required.
     """
 
     def __init__(
             self,
             db_repository: DBRepository[LocationDataRow],
             session: async_sessionmaker,
+            state_repository: StateDBRepository | None = None,
+            throttle: WriteThrottle | None = None,
+            replication_repository: ReplicationDBRepository | None = None,
+            batcher: AdaptiveBatcher | None = None,
+            write_mode: WriteMode = "rows",
+            checkpoint_size: int = 10_000,
+            read_session: async_sessionmaker | None = None,
+            replica_standin: bool = False,
     ):
         """
         Construct.
 
         :param db_repository: Concrete `DBRepository` instance.
         :param session: `async_sessionmaker` instance
+        :param state_repository: Optional concrete `StateDBRepository` instance, required to store
+        change feed cursor
+        :param throttle: Optional `WriteThrottle` instance, enabling paced write mode
+        :param replication_repository: Optional concrete `ReplicationDBRepository` instance, required
+        to measure WAL bytes & replication lag in paced write mode
+        :param batcher: Optional `AdaptiveBatcher` instance, used by repository,
+        whose batch sizes & throughput are reported with `sync_db` event
+        :param write_mode: Written records, returned by database: full rows, only ids or only count.
+        In ids & count modes `sync_db` methods return `WriteSummary`
+        :param checkpoint_size: Rows, committed within one checkpoint of checkpointed synchronization,
+        if writes are not paced by throttle
+        :param read_session: Optional `async_sessionmaker` instance, bound to replica, location data
+        is selected from. Requires replication repository
+        :param replica_standin: Whether read session is bound to a server, that is not a standby,
+        e.g. local stand-in of replica, and is always current. Otherwise, server, that has no replay
+        position, is not considered current
         """
 
+        if checkpoint_size <= 0:
+            raise ValueError("Checkpoint size must be positive")
+
+        if read_session is not None and replication_repository is None:
+            raise ValueError("Replication repository is required to read location data from replica")
+
         self._db_repository = db_repository
+        self._state_repository = state_repository
+        self._throttle = throttle
+        self._replication_repository = replication_repository
+        self._batcher = batcher
+        self._write_mode = write_mode
+        self._checkpoint_size = checkpoint_size
         self._session = session
+        self._read_session = read_session
+        self._replica_standin = replica_standin
+        self._commit_position: int | None = None
+
+    @property
+    def batching(self) -> List[BatchingStats] | None:
+        """Batch sizes & throughput of the last `sync_db` call, if batch sizes are tuned"""
+
+        return None if self._batcher is None else self._batcher.report()
 
     @EventManager.event("select_location_data")
     async def get(self) -> List[LocationData]:
@@ -39,37 +99,464 @@ class LocationDataDBService(DBService[LocationData]):
         :return: List of `LocationData` instances.
         """
 
-        async with self._session() as session:
+        async with (await self._reader())() as session:
             rows = await self._db_repository.get(session=session)
             return [self._row_to_model(row) for row in rows]
 
-    @EventManager.event("sync_db")
+    @EventManager.event("select_location_data_batch")
+    async def get_batch(self) -> LocationDataBatch:
+        """
+        Select all records from location_data as columnar batch.
+
+        :return: `LocationDataBatch` instance
+        """
+
+        async with (await self._reader())() as session:
+            return await self._db_repository.get_batch(session=session)
+
+    @EventManager.event("select_location_data_buckets")
+    async def get_batch_by_buckets(self, bucket_ids: Iterable[int], buckets: int) -> LocationDataBatch:
+        """
+        Select records from location_data, whose packed key falls into provided buckets.
+
+        :param bucket_ids: Iterable of bucket numbers
+        :param buckets: Buckets count
+        :return: `LocationDataBatch` instance
+        """
+
+        async with (await self._reader())() as session:
+            return await self._db_repository.get_batch_by_buckets(
+                bucket_ids=bucket_ids,
+                buckets=buckets,
+                session=session,
+            )
+
+    @EventManager.event("select_location_data_range")
+    async def get_batch_by_key_range(self, start: int | None, stop: int | None) -> LocationDataBatch:
+        """
+        Select records from location_data, whose packed key falls into [start, stop) range.
+
+        :param start: Lowest packed key or None for unbounded range
+        :param stop: Packed key after the highest one or None for unbounded range
+        :return: `LocationDataBatch` instance
+        """
+
+        async with (await self._reader())() as session:
+            return await self._db_repository.get_batch_by_key_range(start=start, stop=stop, session=session)
+
+    async def get_count_estimate(self) -> int:
+        """
+        Select location_data rows count, estimated by database statistics.
+
+        :return: Estimated rows count
+        """
+
+        async with self._session() as session:
+            return await self._db_repository.get_count_estimate(session=session)
+
+    async def get_bucket_checksums(self, buckets: int) -> Dict[int, BucketChecksum]:
+        """
+        Compute per-bucket checksums of location_data packed keys.
+
+        :param buckets: Buckets count
+        :return: Mapping of bucket number to its `BucketChecksum`
+        """
+
+        async with (await self._reader())() as session:
+            return await self._db_repository.get_bucket_checksums(buckets=buckets, session=session)
+
+    async def get_snapshot_checksum(self) -> BucketChecksum:
+        """
+        Compute checksum of location_data packed keys & ids.
+
+        :return: `BucketChecksum` instance
+        """
+
+        async with (await self._reader())() as session:
+            return await self._db_repository.get_snapshot_checksum(session=session)
+
+    async def get_cursor(self) -> str | None:
+        """
+        Select change feed cursor, stored by last `sync_db` call.
+
+        :return: Cursor or None, if it has never been stored
+        """
+
+        if self._state_repository is None:
+            return None
+
+        async with self._session() as session:
+            return await self._state_repository.get(name=_CURSOR_STATE_NAME, session=session)
+
+    @EventManager.event("sync_db", details=lambda service, *args, **kwargs: {"batching": service.batching})
     async def sync_db(
             self,
             to_insert: List[LocationData],
             to_delete: List[LocationData],
-    ) -> Tuple[List[LocationData], List[LocationData]]:
+            cursor: str | None = None,
+    ) -> Tuple[List[LocationData], List[LocationData]] | WriteSummary:
         """
         Inserts & deletes provided location data identifiers.
-        Instances, that are being deleted, should contain not-null `id` attribute.
+        Instances, that are being deleted, should contain not-null `id` attribute,
+        otherwise they are matched by their identifier fields.
+        If cursor is provided, it is stored within the same transaction.
+
+        In paced write mode changes are committed in chunks, limited by throttle, like `sync_db_batch`.
 
         :param to_insert: List of `LocationData` instances to be inserted
         :param to_delete: List of `LocationData` instances to be deleted
-        :return: Tuple, containing list of inserter and list of deleted `LocationData` instances
+        :param cursor: Optional change feed cursor, which provided changes correspond to
+        :return: Tuple, containing list of inserter and list of deleted `LocationData` instances,
+        or `WriteSummary` in ids & count write modes
         """
 
+        if cursor is not None and self._state_repository is None:
+            raise ValueError("State repository is required to store change feed cursor")
+
+        if self._batcher is not None:
+            self._batcher.reset()
+
+        if self._throttle is not None:
+            written = await self._sync_db_batch_chunked(
+                LocationDataBatch.from_models(to_insert),
+                LocationDataBatch.from_models(to_delete),
+                cursor,
+                None,
+            )
+
+            if self._write_mode != "rows":
+                return written
+
+            inserted, deleted = written
+            return list(inserted), list(deleted)
+
         async with self._session.begin() as transaction:
             to_insert_rows = [self._model_to_row(model) for model in to_insert]
             to_delete_rows = [self._model_to_row(model) for model in to_delete]
 
-            inserted_rows = await self._db_repository.insert_many(records=to_insert_rows, session=transaction)
-            deleted_rows = await self._db_repository.delete_many(records=to_delete_rows, session=transaction)
+            inserted_rows = await self._db_repository.insert_many(
+                records=to_insert_rows,
+                session=transaction,
+                mode=self._write_mode,
+            )
+            deleted_rows = await self._db_repository.delete_many(
+                records=to_delete_rows,
+                session=transaction,
+                mode=self._write_mode,
+            )
+
+            if cursor is not None:
+                await self._state_repository.set(name=_CURSOR_STATE_NAME, value=cursor, session=transaction)
+
+        await self._record_commit()
+
+        if self._write_mode != "rows":
+            return self._summary(inserted_rows, deleted_rows)
 
         return (
             [self._row_to_model(row) for row in inserted_rows],
             [self._row_to_model(row) for row in deleted_rows],
         )
 
+    @EventManager.event("sync_db", details=lambda service, *args, **kwargs: {"batching": service.batching})
+    async def sync_db_batch(
+            self,
+            to_insert: LocationDataBatch,
+            to_delete: LocationDataBatch,
+            cursor: str | None = None,
+            checkpoint: str | None = None,
+    ) -> Tuple[LocationDataBatch, LocationDataBatch] | WriteSummary:
+        """
+        Inserts & deletes provided batches of location data identifiers like `sync_db`,
+        passing batches to repository as is.
+
+        In paced write mode changes are committed in chunks, limited by throttle, and
+        cursor is stored after all chunks are committed.
+
+        If checkpoint (sync plan id) is provided, changes are committed in chunks as well,
+        and every chunk stores committed position of the plan within its transaction.
+        Interrupted synchronization of the same plan skips already committed chunks,
+        so returned records contain only changes, written by this call.
+
+        :param to_insert: `LocationDataBatch` to be inserted
+        :param to_delete: `LocationDataBatch` to be deleted
+        :param cursor: Optional change feed cursor, which provided changes correspond to
+        :param checkpoint: Optional sync plan id, enabling checkpointed synchronization
+        :return: Tuple, containing inserted and deleted `LocationDataBatch` instances,
+        or `WriteSummary` in ids & count write modes
+        """
+
+        if cursor is not None and self._state_repository is None:
+            raise ValueError("State repository is required to store change feed cursor")
+
+        if checkpoint is not None and self._state_repository is None:
+            raise ValueError("State repository is required to store sync checkpoints")
+
+        if self._batcher is not None:
+            self._batcher.reset()
+
+        if self._throttle is not None or checkpoint is not None:
+            return await self._sync_db_batch_chunked(to_insert, to_delete, cursor, checkpoint)
+
+        async with self._session.begin() as transaction:
+            inserted = await self._db_repository.insert_batch(
+                batch=to_insert,
+                session=transaction,
+                mode=self._write_mode,
+            )
+            deleted = await self._db_repository.delete_batch(
+                batch=to_delete,
+                session=transaction,
+                mode=self._write_mode,
+            )
+
+            if cursor is not None:
+                await self._state_repository.set(name=_CURSOR_STATE_NAME, value=cursor, session=transaction)
+
+        await self._record_commit()
+
+        if self._write_mode != "rows":
+            return self._summary(inserted, deleted)
+
+        return inserted, deleted
+
+    @EventManager.event("check_rebuild")
+    async def get_rebuild_blockers(self) -> List[str]:
+        """
+        Select kinds of location_data table properties & dependent objects, that would be lost
+        or would make rebuild fail, e.g. privileges, triggers or dependent views.
+
+        :return: List of blocker kinds. Empty, if table may be rebuilt
+        """
+
+        async with self._session() as session:
+            return await self._db_repository.get_rebuild_blockers(session=session)
+
+    @EventManager.event("sync_db", details=lambda service, *args, **kwargs: {"batching": service.batching})
+    async def rebuild_db_batch(
+            self,
+            to_insert: LocationDataBatch,
+            to_delete: LocationDataBatch,
+            cursor: str | None = None,
+    ) -> Tuple[LocationDataBatch, LocationDataBatch] | WriteSummary:
+        """
+        Applies provided batches of location data identifiers by rebuilding location_data table
+        into shadow table, that replaces it, within one transaction. Unlike `sync_db_batch`,
+        changes are neither paced nor checkpointed. Deleted records are matched by their identifiers.
+
+        :param to_insert: `LocationDataBatch` to be inserted
+        :param to_delete: `LocationDataBatch` to be deleted
+        :param cursor: Optional change feed cursor, which provided changes correspond to
+        :return: Tuple, containing inserted and deleted `LocationDataBatch` instances,
+        or `WriteSummary` in ids & count write modes
+        """
+
+        if cursor is not None and self._state_repository is None:
+            raise ValueError("State repository is required to store change feed cursor")
+
+        if self._batcher is not None:
+            self._batcher.reset()
+
+        async with self._session.begin() as transaction:
+            inserted, deleted = await self._db_repository.rebuild_batch(
+                to_insert=to_insert,
+                to_delete=to_delete,
+                session=transaction,
+                mode=self._write_mode,
+            )
+
+            if cursor is not None:
+                await self._state_repository.set(name=_CURSOR_STATE_NAME, value=cursor, session=transaction)
+
+        await self._record_commit()
+
+        if self._write_mode != "rows":
+            return self._summary(inserted, deleted)
+
+        return inserted, deleted
+
+    async def _sync_db_batch_chunked(
+            self,
+            to_insert: LocationDataBatch,
+            to_delete: LocationDataBatch,
+            cursor: str | None,
+            checkpoint: str | None,
+    ) -> Tuple[LocationDataBatch, LocationDataBatch] | WriteSummary:
+        """
+        Inserts & deletes provided batches in chunks, committing every chunk in its own
+        transaction and pacing chunks with throttle, if provided (there is no pause after the last chunk).
+        Interrupted synchronization leaves already committed chunks, which are not calculated
+        as difference again.
+
+        If checkpoint is provided, position of the plan (inserts first, then deletes) after every chunk
+        is stored within chunk transaction, and chunks before stored position of the same plan are skipped.
+
+        :param to_insert: `LocationDataBatch` to be inserted
+        :param to_delete: `LocationDataBatch` to be deleted
+        :param cursor: Optional change feed cursor, which provided changes correspond to
+        :param checkpoint: Optional sync plan id
+        :return: Tuple, containing inserted and deleted `LocationDataBatch` instances,
+        or `WriteSummary` in ids & count write modes
+        """
+
+        inserted = []
+        deleted = []
+
+        operations = (
+            (to_insert, self._db_repository.insert_batch, inserted),
+            (to_delete, self._db_repository.delete_batch, deleted),
+        )
+
+        chunk_size = self._checkpoint_size if self._throttle is None else self._throttle.chunk_size
+        measures_wal = (
+            self._throttle is not None and self._throttle.measures_wal and self._replication_repository is not None
+        )
+
+        committed = 0 if checkpoint is None else await self._get_checkpoint(checkpoint)
+        total = len(to_insert) + len(to_delete)
+        offset = 0
+
+        try:
+            for batch, write, written in operations:
+                for start in range(max(0, committed - offset), len(batch), chunk_size):
+                    chunk = batch.slice(start, start + chunk_size)
+                    position = offset + start + len(chunk)
+                    wal_bytes = 0
+                    started = time.monotonic()
+
+                    async with self._session.begin() as transaction:
+                        if measures_wal:
+                            wal_start = await self._replication_repository.get_wal_position(session=transaction)
+
+                        written.append(await write(batch=chunk, session=transaction, mode=self._write_mode))
+
+                        if measures_wal:
+                            wal_end = await self._replication_repository.get_wal_position(session=transaction)
+                            wal_bytes = wal_end - wal_start
+
+                        if checkpoint is not None:
+                            await self._state_repository.set(
+                                name=_CHECKPOINT_STATE_NAME,
+                                value=f"{checkpoint}:{position}",
+                                session=transaction,
+                            )
+
+                    if self._throttle is not None and position < total:
+                        await self._throttle.pace(
+                            rows=len(chunk),
+                            wal_bytes=wal_bytes,
+                            elapsed=time.monotonic() - started,
+                            replication_lag=self._get_replication_lag if self._replication_repository else None,
+                        )
+
+                offset += len(batch)
+        finally:
+            # Chunks, committed before interruption, must be replayed by replica before it is read
+            await self._record_commit()
+
+        if cursor is not None:
+            async with self._session.begin() as transaction:
+                await self._state_repository.set(name=_CURSOR_STATE_NAME, value=cursor, session=transaction)
+
+        if self._write_mode == "count":
+            return WriteSummary(sum(inserted), sum(deleted))
+
+        merged_inserted = LocationDataBatch() if self._write_mode == "rows" else array("q")
+        merged_deleted = LocationDataBatch() if self._write_mode == "rows" else array("q")
+
+        for merged, written in ((merged_inserted, inserted), (merged_deleted, deleted)):
+            for chunk in written:
+                merged.extend(chunk)
+
+        if self._write_mode == "ids":
+            return self._summary(merged_inserted, merged_deleted)
+
+        return merged_inserted, merged_deleted
+
+    def _summary(self, inserted: array | int, deleted: array | int) -> WriteSummary:
+        """
+        Creates `WriteSummary` of ids or counts of written records.
+
+        :param inserted: `array` of inserted ids or inserted count
+        :param deleted: `array` of deleted ids or deleted count
+        :return: `WriteSummary` instance
+        """
+
+        if self._write_mode == "ids":
+            return WriteSummary(len(inserted), len(deleted), inserted, deleted)
+
+        return WriteSummary(inserted, deleted)
+
+    async def _reader(self) -> async_sessionmaker:
+        """
+        Chooses session, location data is selected with: replica, if it has replayed
+        the last write of this service, or the primary otherwise.
+
+        :return: `async_sessionmaker` instance
+        """
+
+        if self._read_session is None or not await self._replica_is_current():
+            return self._session
+
+        return self._read_session
+
+    @EventManager.event("check_replica")
+    async def _replica_is_current(self) -> bool:
+        """
+        Checks, whether replica has replayed WAL position of the last write of this service,
+        or current WAL position of the primary, if this service has not written yet.
+        Server without replay position, i.e. not in recovery, is considered current only if it is
+        configured as replica stand-in, e.g. promoted replica is not read from.
+
+        :return: Whether location data may be selected from replica
+        """
+
+        if self._commit_position is None:
+            async with self._session() as session:
+                self._commit_position = await self._replication_repository.get_wal_position(session=session)
+
+        async with self._read_session() as session:
+            replayed = await self._replication_repository.get_replay_position(session=session)
+
+        if replayed is None:
+            return self._replica_standin
+
+        return replayed >= self._commit_position
+
+    async def _record_commit(self):
+        """Records WAL position of the primary after write, that replica must replay before it is read"""
+
+        if self._read_session is None:
+            return
+
+        async with self._session() as session:
+            self._commit_position = await self._replication_repository.get_wal_position(session=session)
+
+    async def _get_checkpoint(self, checkpoint: str) -> int:
+        """
+        Select committed position of sync plan.
+
+        :param checkpoint: Sync plan id
+        :return: Number of committed changes of the plan. 0, if another plan has been checkpointed last
+        """
+
+        async with self._session() as session:
+            value = await self._state_repository.get(name=_CHECKPOINT_STATE_NAME, session=session)
+
+        plan_id, _, position = (value or "").partition(":")
+
+        return int(position) if plan_id == checkpoint and position.isdigit() else 0
+
+    async def _get_replication_lag(self) -> float:
+        """
+        Select replication lag.
+
+        :return: Replication lag in seconds
+        """
+
+        async with self._session() as session:
+            return await self._replication_repository.get_replication_lag(session=session)
+
     @staticmethod
     def _model_to_row(model: LocationData) -> LocationDataRow:
         """
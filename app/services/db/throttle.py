@@ -0,0 +1,95 @@
+"""This module contains WriteThrottle class"""
+
+import asyncio
+
+from typing import Awaitable, Callable
+
+
+class WriteThrottle:
+    """
+    This class describes paced write mode: changes are committed in bounded chunks,
+    and every chunk is followed by a pause, that keeps write rate within rows per second
+    and WAL bytes per second budgets. Optionally, next chunk is held back while
+    replication lag exceeds provided limit.
+    """
+
+    def __init__(
+            self,
+            chunk_size: int = 10_000,
+            rows_per_second: float | None = None,
+            wal_bytes_per_second: float | None = None,
+            max_replication_lag: float | None = None,
+            lag_check_interval: float = 1.0,
+    ):
+        """
+        Construct.
+
+        :param chunk_size: Maximum number of rows, committed within one transaction
+        :param rows_per_second: Optional written rows per second budget
+        :param wal_bytes_per_second: Optional generated WAL bytes per second budget
+        :param max_replication_lag: Optional maximum replication lag in seconds
+        :param lag_check_interval: Replication lag polling interval in seconds
+        """
+
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be positive")
+
+        self.chunk_size = chunk_size
+        self._rows_per_second = rows_per_second
+        self._wal_bytes_per_second = wal_bytes_per_second
+        self._max_replication_lag = max_replication_lag
+        self._lag_check_interval = lag_check_interval
+
+    @property
+    def measures_wal(self) -> bool:
+        """Whether WAL bytes, generated by every chunk, should be measured"""
+
+        return self._wal_bytes_per_second is not None
+
+    def delay(self, rows: int, wal_bytes: int, elapsed: float) -> float:
+        """
+        Calculates pause, required after chunk to stay within budgets.
+
+        :param rows: Rows, written by chunk
+        :param wal_bytes: WAL bytes, generated by chunk
+        :param elapsed: Chunk duration in seconds
+        :return: Pause duration in seconds
+        """
+
+        required = 0.0
+
+        if self._rows_per_second:
+            required = max(required, rows / self._rows_per_second)
+
+        if self._wal_bytes_per_second:
+            required = max(required, wal_bytes / self._wal_bytes_per_second)
+
+        return max(0.0, required - elapsed)
+
+    async def pace(
+            self,
+            rows: int,
+            wal_bytes: int,
+            elapsed: float,
+            replication_lag: Callable[[], Awaitable[float]] | None = None,
+    ):
+        """
+        Sleeps after chunk to stay within budgets, then waits until replication lag,
+        reported by provided probe, drops below the limit.
+
+        :param rows: Rows, written by chunk
+        :param wal_bytes: WAL bytes, generated by chunk
+        :param elapsed: Chunk duration in seconds
+        :param replication_lag: Optional async callable, returning replication lag in seconds
+        """
+
+        delay = self.delay(rows=rows, wal_bytes=wal_bytes, elapsed=elapsed)
+
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self._max_replication_lag is None or replication_lag is None:
+            return
+
+        while await replication_lag() > self._max_replication_lag:
+            await asyncio.sleep(self._lag_check_interval)
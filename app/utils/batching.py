@@ -0,0 +1,103 @@
+"""This module contains AdaptiveBatcher class"""
+
+from typing import Dict, List, NamedTuple
+
+
+class BatchingStats(NamedTuple):
+    """Batch sizes & throughput of one statement kind, observed since batcher reset"""
+
+    operation: str
+    sizes: List[int]
+    rows: int
+    duration: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.duration if self.duration else 0.0
+
+
+class AdaptiveBatcher:
+    """
+    This class tunes batch size of bulk statements toward target statement duration.
+
+    After every statement batcher calculates rows per second and sets the next batch size
+    of the same statement kind (operation) to rows, that would be processed within target
+    duration at that rate. Batch size changes at most twice per statement and stays within
+    configured limits, so that single slow or fast statement does not swing it.
+    """
+
+    def __init__(
+            self,
+            target_duration: float = 0.5,
+            initial_size: int = 10_000,
+            min_size: int = 1_000,
+            max_size: int = 100_000,
+    ):
+        """
+        Construct.
+
+        :param target_duration: Target statement duration in seconds
+        :param initial_size: Batch size of the first statement of every operation
+        :param min_size: Minimum batch size
+        :param max_size: Maximum batch size
+        """
+
+        if not 0 < min_size <= initial_size <= max_size:
+            raise ValueError("Batch sizes must satisfy 0 < min_size <= initial_size <= max_size")
+
+        self._target_duration = target_duration
+        self._initial_size = initial_size
+        self._min_size = min_size
+        self._max_size = max_size
+
+        self._sizes: Dict[str, int] = {}
+        self._stats: Dict[str, BatchingStats] = {}
+
+    def size(self, operation: str) -> int:
+        """
+        Returns the next batch size of operation.
+
+        :param operation: Statement kind, e.g. insert or delete
+        :return: Batch size
+        """
+
+        return self._sizes.get(operation, self._initial_size)
+
+    def observe(self, operation: str, rows: int, duration: float):
+        """
+        Records statement duration & adjusts the next batch size of operation.
+
+        :param operation: Statement kind, e.g. insert or delete
+        :param rows: Rows, passed to statement
+        :param duration: Statement duration in seconds
+        """
+
+        stats = self._stats.get(operation, BatchingStats(operation, [], 0, 0.0))
+        stats.sizes.append(rows)
+        self._stats[operation] = stats._replace(rows=stats.rows + rows, duration=stats.duration + duration)
+
+        size = self.size(operation)
+
+        # Small tail batch is dominated by round trip, and partial batch
+        # does not show whether larger batch would be faster
+        if duration <= 0 or rows < size / 2:
+            return
+
+        proposed = rows / duration * self._target_duration
+        proposed = min(max(proposed, size / 2), size * 2 if rows >= size else size)
+
+        self._sizes[operation] = int(min(max(proposed, self._min_size), self._max_size))
+
+    def report(self) -> List[BatchingStats]:
+        """
+        Returns batch sizes & throughput, observed since the last reset.
+
+        :return: List of `BatchingStats` instances per operation
+        """
+
+        return list(self._stats.values())
+
+    def reset(self):
+        """Forgets observed statistics, keeping tuned batch sizes"""
+
+        self._stats = {}
@@ -3,7 +3,12 @@
 from logging import DEBUG, INFO, WARNING, ERROR, Logger
 from typing import List, Tuple
 
+from app.core.batch import WriteSummary
+from app.core.journal import SyncPlan
 from app.core.models import LocationData
+from app.utils.batching import BatchingStats
+from app.utils.latency import LatencyStats
+from app.utils.memory import MemoryStage
 
 
 class EventLogger:
@@ -38,9 +43,27 @@ class EventLogger:
         message = f"{message} {location_data}"
         self._logger.log(level=level, msg=message)
 
-    def log_sync_db(self, updated_data: Tuple[List[LocationData], List[LocationData]]):
+    def log_sync_db(
+            self,
+            updated_data: Tuple[List[LocationData], List[LocationData]] | WriteSummary,
+            batching: List[BatchingStats] | None = None,
+    ):
         """Log sync_db event"""
 
+        if isinstance(updated_data, WriteSummary):
+            self._log_write_summary(updated_data)
+        else:
+            self._log_written_rows(updated_data)
+
+        for stats in batching or ():
+            self._logger.info(
+                f"Batched {stats.operation}: {stats.rows} rows in {len(stats.sizes)} statements "
+                f"(sizes {min(stats.sizes)}-{max(stats.sizes)}), {stats.rows_per_second:.0f} rows/s"
+            )
+
+    def _log_written_rows(self, updated_data: Tuple[List[LocationData], List[LocationData]]):
+        """Log inserted & deleted location data instances one by one"""
+
         inserted, deleted = updated_data
 
         for identifier in inserted:
@@ -48,7 +71,88 @@ class EventLogger:
         for identifier in deleted:
             self._log_location_data(identifier, message="DELETE")
 
-    def log_fetch_location_data_api(self, received_data: List[LocationData]):
+    def _log_write_summary(self, summary: WriteSummary):
+        """Log counts & ids of inserted and deleted location data"""
+
+        self._logger.info(f"INSERT {summary.inserted} location data identifiers")
+
+        if summary.inserted_ids:
+            self._logger.info(f"INSERT ids {', '.join(map(str, summary.inserted_ids))}")
+
+        self._logger.info(f"DELETE {summary.deleted} location data identifiers")
+
+        if summary.deleted_ids:
+            self._logger.info(f"DELETE ids {', '.join(map(str, summary.deleted_ids))}")
+
+    def log_fetch_location_data_api(self, received_data: List[LocationData], latency: LatencyStats | None = None):
         """Log fetch_location_data_api event"""
 
-        self._logger.info(f"Fetched API. Received {len(received_data)} location data identifiers")
+        message = f"Fetched API. Received {len(received_data)} location data identifiers"
+
+        if latency is not None:
+            message += (
+                f" from {latency.source} in {latency.last:.3f}s "
+                f"(p50 {latency.p50:.3f}s, p90 {latency.p90:.3f}s, p99 {latency.p99:.3f}s over {latency.samples})"
+            )
+
+        self._logger.info(message)
+
+    def log_fetch_location_data_changes_api(self, received_changes: Tuple[List[LocationData], List[LocationData], str]):
+        """Log fetch_location_data_changes_api event"""
+
+        added, removed, cursor = received_changes
+
+        self._logger.info(
+            f"Fetched changes API. Received {len(added)} added and {len(removed)} removed "
+            f"location data identifiers, cursor {cursor}"
+        )
+
+    def log_sync_memory(self, stages: List[MemoryStage]):
+        """Log sync_memory event"""
+
+        if not stages:
+            return
+
+        report = ", ".join(
+            f"{stage.name} rss {stage.rss / 2 ** 20:.1f}MiB"
+            + (f" traced peak {stage.traced_peak / 2 ** 20:.1f}MiB" if stage.traced_peak is not None else "")
+            for stage in stages
+        )
+        self._logger.info(f"Synchronization memory usage: {report}, peak rss {stages[-1].peak_rss / 2 ** 20:.1f}MiB")
+
+    def log_acquire_leadership(self, is_leader: bool):
+        """Log acquire_leadership event"""
+
+        if not is_leader:
+            self._logger.info("Synchronization skipped. Another replica is the leader")
+
+    def log_claim_shards(self, shards: List[int]):
+        """Log claim_shards event"""
+
+        self._logger.info(f"Claimed {len(shards)} shards: {', '.join(map(str, shards)) or 'none'}")
+
+    def log_sync_plan(self, plan: SyncPlan):
+        """Log sync_plan event"""
+
+        if plan.plan_id is None:
+            return
+
+        self._logger.info(
+            f"{'Resumed' if plan.resumed else 'Journaled'} sync plan {plan.plan_id}: "
+            f"{len(plan.to_insert)} to insert, {len(plan.to_delete)} to delete"
+        )
+
+    def log_check_rebuild(self, blockers: List[str]):
+        """Log check_rebuild event"""
+
+        if blockers:
+            self._logger.info(
+                f"location_data table has {', '.join(blockers)}, which rebuild does not carry over. "
+                "Changes are written row by row"
+            )
+
+    def log_check_replica(self, current: bool):
+        """Log check_replica event"""
+
+        if not current:
+            self._logger.info("Replica has not replayed the last write. Location data is selected from primary")
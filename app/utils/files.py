@@ -0,0 +1,35 @@
+"""This module contains atomic file writing helper"""
+
+import os
+
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+
+
+@contextmanager
+def atomic_write(path: str) -> Iterator[BinaryIO]:
+    """
+    Opens temporary file for binary writing, which replaces file at provided path
+    only after context exits and data is flushed to disk, so that file is never left partially written.
+    Temporary file is removed, if writing fails.
+
+    :param path: File path
+    :return: Binary file object of temporary file
+    """
+
+    tmp_path = f"{path}.tmp"
+
+    try:
+        with open(tmp_path, "wb") as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+        raise
@@ -0,0 +1,105 @@
+"""This module contains packed location identifier keys and bucket checksums functionality"""
+
+from typing import NamedTuple, Dict, Iterable, Tuple
+
+ECI_OFFSET = 1 << 32
+NO_CELLID = 0xFFFF
+
+# Packed keys are below 2^34 and the multiplier is below 2^28,
+# so that mixed keys fit PostgreSQL bigint without overflow
+MIX_MULTIPLIER = 0x9E3779B
+MIX_SHIFT = 17
+MIX_FOLD_SHIFT = 31
+
+
+class BucketChecksum(NamedTuple):
+    """This class describes aggregated checksum of packed keys within a bucket"""
+
+    count: int
+    total: int
+    mixed: int
+
+
+def pack_key(lac: int | None, cellid: int | None, eci: int | None) -> int:
+    """
+    Packs valid (lac, cellid, eci) identifier into a single non-negative integer.
+    ECI identifiers are placed above 2^32, lac & cellid identifiers occupy
+    high & low 16 bits below 2^32, missing cellid is encoded as 0xFFFF.
+
+    :param lac: lac value
+    :param cellid: cellid value
+    :param eci: eci value
+    :return: Packed key
+    """
+
+    if eci is not None:
+        return ECI_OFFSET + eci
+
+    return (lac << 16) | (NO_CELLID if cellid is None else cellid)
+
+
+def unpack_key(packed: int) -> Tuple[int | None, int | None, int | None]:
+    """
+    Unpacks key, created by `pack_key`.
+
+    :param packed: Packed key
+    :return: Tuple of lac, cellid & eci values
+    """
+
+    if packed >= ECI_OFFSET:
+        return None, None, packed - ECI_OFFSET
+
+    cellid = packed & 0xFFFF
+
+    return packed >> 16, None if cellid == NO_CELLID else cellid, None
+
+
+def mix_key(packed: int) -> int:
+    """
+    Scrambles packed key with xorshift-multiply-xorshift, so that bucket checksums detect
+    keys substitutions not changing keys total. Mixed key is non-negative and below 2^62.
+    Must match SQL expression, used by DB repository.
+
+    :param packed: Packed key
+    :return: Scrambled key
+    """
+
+    mixed = (packed ^ (packed >> MIX_SHIFT)) * MIX_MULTIPLIER
+
+    return mixed ^ (mixed >> MIX_FOLD_SHIFT)
+
+
+def mix_item(packed: int, identifier: int) -> int:
+    """
+    Scrambles packed key together with id of its record, so that snapshot checksum
+    detects ids substitutions. Must match SQL expression, used by DB repository.
+
+    :param packed: Packed key
+    :param identifier: Record id
+    :return: Scrambled item
+    """
+
+    return mix_key(packed) ^ mix_key(identifier)
+
+
+def bucket_checksums(keys: Iterable[int], buckets: int) -> Dict[int, BucketChecksum]:
+    """
+    Computes count, total & mixed total of packed keys per bucket.
+    Key bucket is the remainder of packed key division by buckets count.
+
+    :param keys: Iterable of packed keys
+    :param buckets: Buckets count
+    :return: Mapping of bucket number to its `BucketChecksum`. Empty buckets are omitted
+    """
+
+    counts: Dict[int, int] = {}
+    totals: Dict[int, int] = {}
+    mixed: Dict[int, int] = {}
+
+    for key in keys:
+        bucket = key % buckets
+        counts[bucket] = counts.get(bucket, 0) + 1
+        totals[bucket] = totals.get(bucket, 0) + key
+        mixed[bucket] = mixed.get(bucket, 0) + mix_key(key)
+
+    return {bucket: BucketChecksum(counts[bucket], totals[bucket], mixed[bucket]) for bucket in counts}
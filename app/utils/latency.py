@@ -0,0 +1,69 @@
+"""This module contains LatencyRecorder class"""
+
+import math
+
+from collections import deque
+from typing import NamedTuple
+
+
+class LatencyStats(NamedTuple):
+    """Latency percentiles over recorded window, in seconds"""
+
+    last: float
+    p50: float
+    p90: float
+    p99: float
+    samples: int
+    source: str | None
+
+
+class LatencyRecorder:
+    """
+    This class records latencies of the last N operations,
+    e.g. upstream fetches, and calculates their percentiles.
+    """
+
+    def __init__(self, window: int = 100):
+        """
+        Construct.
+
+        :param window: Number of the last latencies, percentiles are calculated over
+        """
+
+        self._latencies = deque(maxlen=window)
+        self._source: str | None = None
+
+    def record(self, latency: float, source: str | None = None):
+        """
+        Records operation latency.
+
+        :param latency: Latency in seconds
+        :param source: Optional operation source, e.g. endpoint, that served request
+        """
+
+        self._latencies.append(latency)
+        self._source = source
+
+    def stats(self) -> LatencyStats | None:
+        """
+        Calculates nearest-rank percentiles of recorded latencies.
+
+        :return: `LatencyStats` instance or None, if nothing has been recorded
+        """
+
+        if not self._latencies:
+            return None
+
+        ordered = sorted(self._latencies)
+
+        def percentile(rank: float) -> float:
+            return ordered[max(0, math.ceil(rank * len(ordered)) - 1)]
+
+        return LatencyStats(
+            last=self._latencies[-1],
+            p50=percentile(0.5),
+            p90=percentile(0.9),
+            p99=percentile(0.99),
+            samples=len(ordered),
+            source=self._source,
+        )
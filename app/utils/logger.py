@@ -3,6 +3,9 @@ import sys
 
 from queue import Queue
 from logging.handlers import QueueHandler, QueueListener
+from typing import Dict
+
+_listeners: Dict[str, QueueListener] = {}
 
 
 def create_queue_logger(name: str) -> logging.Logger:
@@ -31,7 +34,23 @@ def create_queue_logger(name: str) -> logging.Logger:
     listener = QueueListener(logging_queue, handler)
     listener.start()
 
+    _listeners[name] = listener
+
     logger.addHandler(queue_handler)
     logger.propagate = False
 
     return logger
+
+
+def flush_queue_logger(name: str):
+    """
+    Stops QueueListener of the logger, created by `create_queue_logger`.
+    All records, that are still in the queue, are processed before return.
+
+    :param name: Logger name
+    """
+
+    listener = _listeners.pop(name, None)
+
+    if listener is not None:
+        listener.stop()
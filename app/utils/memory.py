@@ -0,0 +1,190 @@
+"""This module contains memory accounting & memory budget classes"""
+
+import math
+import os
+import resource
+import sys
+import tracemalloc
+
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def peak_rss() -> int:
+    """
+    Returns peak resident set size of the process.
+
+    :return: Peak RSS in bytes
+    """
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+
+
+def current_rss() -> int:
+    """
+    Returns current resident set size of the process.
+    Falls back to peak RSS, if current RSS is not available on the platform.
+
+    :return: RSS in bytes
+    """
+
+    try:
+        with open("/proc/self/statm", "rb") as file:
+            return int(file.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return peak_rss()
+
+
+class MemoryStage(NamedTuple):
+    """
+    Memory usage of a synchronization stage.
+    Traced peak is None, if tracemalloc is not tracing.
+    """
+
+    name: str
+    traced_peak: int | None
+    rss: int
+    peak_rss: int
+
+
+class MemoryMonitor:
+    """
+    This class measures memory usage of synchronization cycle stages.
+
+    Every stage records peak size of Python allocations, traced by tracemalloc, and samples
+    process RSS at stage end together with RSS high-water mark, so that the stage, which
+    grows the process, can be found. Stages with the same name within one cycle, e.g. chunks,
+    are merged keeping maximum values.
+    """
+
+    def __init__(self, trace: bool = False):
+        """
+        Construct.
+
+        :param trace: Whether to start tracemalloc. Tracing slows down allocations,
+        so only RSS is sampled by default
+        """
+
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        self._stages: Dict[str, MemoryStage] = {}
+
+    @property
+    def tracing(self) -> bool:
+        """Whether Python allocations are traced"""
+
+        return tracemalloc.is_tracing()
+
+    @property
+    def stages(self) -> List[MemoryStage]:
+        """List of stages, measured since last reset, in order of their start"""
+
+        return list(self._stages.values())
+
+    @property
+    def peak(self) -> int:
+        """Peak memory usage of stages, measured since last reset, in bytes"""
+
+        return max(
+            (stage.traced_peak if stage.traced_peak is not None else stage.rss for stage in self._stages.values()),
+            default=0,
+        )
+
+    def reset(self):
+        """Forgets measured stages, e.g. before new synchronization cycle"""
+
+        self._stages = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Measures memory usage of the code within context as stage.
+
+        :param name: Stage name
+        """
+
+        tracing = tracemalloc.is_tracing()
+
+        if tracing:
+            tracemalloc.reset_peak()
+
+        try:
+            yield
+        finally:
+            traced_peak = tracemalloc.get_traced_memory()[1] if tracing else None
+            rss = current_rss()
+            stage = MemoryStage(name, traced_peak, rss, max(rss, peak_rss()))
+            previous = self._stages.get(name)
+
+            if previous is not None:
+                stage = MemoryStage(
+                    name,
+                    None if traced_peak is None else max(traced_peak, previous.traced_peak or 0),
+                    max(stage.rss, previous.rss),
+                    stage.peak_rss,
+                )
+
+            self._stages[name] = stage
+
+
+class MemoryBudget:
+    """
+    This class projects working set of a full synchronization cycle and calculates
+    the number of key-range partitions, required to stay within memory budget.
+
+    Working set is projected as number of actual & existing rows multiplied by bytes per row.
+    Bytes per row starts with conservative estimate and is refined from traced peaks of
+    cycles, processed at once.
+    """
+
+    DEFAULT_ROW_BYTES = 512
+
+    def __init__(self, budget: int, row_bytes: int = DEFAULT_ROW_BYTES):
+        """
+        Construct.
+
+        :param budget: Memory budget of a cycle in bytes
+        :param row_bytes: Initial estimate of working set bytes per row
+        """
+
+        if budget <= 0:
+            raise ValueError("Memory budget must be positive")
+
+        self.budget = budget
+        self.row_bytes = row_bytes
+
+    def project(self, rows: int) -> int:
+        """
+        Projects working set of a cycle.
+
+        :param rows: Total number of actual & existing rows
+        :return: Projected working set in bytes
+        """
+
+        return rows * self.row_bytes
+
+    def partitions(self, rows: int) -> int:
+        """
+        Calculates number of partitions, whose working sets fit memory budget.
+
+        :param rows: Total number of actual & existing rows
+        :return: Partitions count, 1 if cycle fits memory budget as a whole
+        """
+
+        return max(1, math.ceil(self.project(rows) / self.budget))
+
+    def observe(self, rows: int, peak: int):
+        """
+        Refines bytes per row estimate with peak memory usage of a cycle, processed at once.
+
+        :param rows: Total number of actual & existing rows
+        :param peak: Traced peak memory usage of the cycle in bytes
+        """
+
+        if rows and peak:
+            self.row_bytes = max(1, math.ceil(peak / rows))
@@ -0,0 +1,222 @@
+"""This module contains CycleProfiler class"""
+
+import asyncio
+import cProfile
+import itertools
+import json
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+_TOP_ALLOCATIONS = 50
+
+_logger = logging.getLogger(__name__)
+
+
+class CycleProfiler:
+    """
+    This class profiles synchronization cycles on demand.
+
+    Profiling is armed for the next N cycles by `arm` method, e.g. from signal handler,
+    or by flag file, whose optional content is cycles count. Armed cycle is profiled with
+    deterministic `cProfile`, event loop tasks, created within cycle, are timed with task factory,
+    and Python allocations are traced with tracemalloc. Every profiled cycle is written into
+    its own JSON file, containing cycle id, stage markers, task timings, function statistics
+    and top allocation sites.
+
+    While disarmed, cycle costs a single flag file existence check and no profiler,
+    task factory or tracer is installed.
+    """
+
+    def __init__(self, directory: str, cycles: int = 1, flag_path: str | None = None):
+        """
+        Construct.
+
+        :param directory: Directory, profile files are written into
+        :param cycles: Number of cycles, profiled when armed without explicit count
+        :param flag_path: Optional flag file path. Existing flag file arms profiler and is removed
+        """
+
+        self._directory = directory
+        self._cycles = cycles
+        self._flag_path = flag_path
+        self._remaining = 0
+        self._counter = itertools.count(1)
+
+        self._started = 0.0
+        self._stages: List[Dict[str, Any]] = []
+        self._tasks: List[Dict[str, Any]] = []
+        self._active = False
+
+    @property
+    def active(self) -> bool:
+        """Whether current cycle is being profiled"""
+
+        return self._active
+
+    def arm(self, cycles: int | None = None):
+        """
+        Arms profiling of the next cycles.
+
+        :param cycles: Number of cycles to be profiled. Defaults to configured count
+        """
+
+        self._remaining = self._cycles if cycles is None else cycles
+
+    def _check_flag(self):
+        """Arms profiler, if flag file exists, & removes flag file"""
+
+        if self._flag_path is None or not os.path.exists(self._flag_path):
+            return
+
+        try:
+            with open(self._flag_path) as file:
+                content = file.read().strip()
+            os.remove(self._flag_path)
+        except OSError:
+            return
+
+        self.arm(int(content) if content.isdigit() else None)
+
+    @contextmanager
+    def cycle(self):
+        """
+        Profiles the code within context as one cycle, if profiler is armed.
+        Must be entered within running event loop.
+        """
+
+        self._check_flag()
+
+        if self._remaining <= 0:
+            yield
+            return
+
+        self._remaining -= 1
+
+        cycle_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{next(self._counter)}"
+        loop = asyncio.get_running_loop()
+        task_factory = loop.get_task_factory()
+        tracing = tracemalloc.is_tracing()
+
+        self._started = time.perf_counter()
+        self._stages = []
+        self._tasks = []
+        self._active = True
+
+        if not tracing:
+            tracemalloc.start()
+
+        tracemalloc.reset_peak()
+        loop.set_task_factory(self._task_factory)
+        profile = cProfile.Profile()
+        profile.enable()
+
+        try:
+            yield
+        finally:
+            profile.disable()
+            loop.set_task_factory(task_factory)
+            self._active = False
+
+            duration = time.perf_counter() - self._started
+            traced_peak = tracemalloc.get_traced_memory()[1]
+            allocations = tracemalloc.take_snapshot().statistics("lineno")[:_TOP_ALLOCATIONS]
+
+            if not tracing:
+                tracemalloc.stop()
+
+            # Failed profile write must neither fail the cycle nor replace its exception
+            try:
+                self._write(cycle_id, duration, profile, traced_peak, allocations)
+            except Exception:
+                _logger.exception("Profile of cycle %s could not be written", cycle_id)
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Marks start & end of cycle stage, if cycle is being profiled.
+
+        :param name: Stage name
+        """
+
+        if not self._active:
+            yield
+            return
+
+        started = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self._stages.append({
+                "name": name,
+                "start": started - self._started,
+                "end": time.perf_counter() - self._started,
+            })
+
+    def _task_factory(self, loop: asyncio.AbstractEventLoop, coro, **kwargs) -> asyncio.Task:
+        """Creates task, whose creation & completion times are recorded"""
+
+        task = asyncio.Task(coro, loop=loop, **kwargs)
+        name = getattr(coro, "__qualname__", type(coro).__name__)
+        created = time.perf_counter()
+
+        def done(_task: asyncio.Task):
+            self._tasks.append({
+                "name": name,
+                "start": created - self._started,
+                "duration": time.perf_counter() - created,
+            })
+
+        task.add_done_callback(done)
+
+        return task
+
+    def _write(
+            self,
+            cycle_id: str,
+            duration: float,
+            profile: cProfile.Profile,
+            traced_peak: int,
+            allocations: List[tracemalloc.Statistic],
+    ):
+        """Writes profile of the cycle into JSON file"""
+
+        stats = pstats.Stats(profile).stats
+        functions = sorted(
+            (
+                {
+                    "function": f"{filename}:{line}({name})",
+                    "calls": calls,
+                    "total_time": total_time,
+                    "cumulative_time": cumulative_time,
+                }
+                for (filename, line, name), (_primitive, calls, total_time, cumulative_time, _callers)
+                in stats.items()
+            ),
+            key=lambda function: function["cumulative_time"],
+            reverse=True,
+        )
+
+        report = {
+            "cycle_id": cycle_id,
+            "duration": duration,
+            "stages": self._stages,
+            "tasks": self._tasks,
+            "functions": functions,
+            "traced_peak": traced_peak,
+            "allocations": [
+                {"location": str(allocation.traceback), "size": allocation.size, "count": allocation.count}
+                for allocation in allocations
+            ],
+        }
+
+        os.makedirs(self._directory, exist_ok=True)
+
+        with open(os.path.join(self._directory, f"cycle-{cycle_id}.json"), "w") as file:
+            json.dump(report, file, indent=1)
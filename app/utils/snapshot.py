@@ -0,0 +1,135 @@
+"""This module contains LocationDataSnapshot class"""
+
+import mmap
+import struct
+
+from array import array
+from typing import Iterable, Tuple
+
+from app.utils.files import atomic_write
+from app.utils.keys import BucketChecksum, mix_key, mix_item
+
+_MAGIC = b"LDSNAP01"
+_HEADER = struct.Struct("<8sQQQ")
+_ITEM_SIZE = 8
+_UINT64_MASK = (1 << 64) - 1
+
+
+def header_checksum(checksum: BucketChecksum) -> BucketChecksum:
+    """
+    Reduces checksum totals modulo 2^64 to fit snapshot header.
+
+    :param checksum: `BucketChecksum` instance
+    :return: Reduced `BucketChecksum` instance
+    """
+
+    return BucketChecksum(checksum.count, checksum.total & _UINT64_MASK, checksum.mixed & _UINT64_MASK)
+
+
+def snapshot_checksum(keys: Iterable[int], ids: Iterable[int] | None = None) -> BucketChecksum:
+    """
+    Computes checksum of packed keys as the only bucket, reduced to fit snapshot header.
+    If ids are provided, every key is mixed together with its id, see `mix_item`.
+
+    :param keys: Iterable of packed keys
+    :param ids: Optional iterable of ids, corresponding to packed keys
+    :return: `BucketChecksum` instance
+    """
+
+    count = total = mixed = 0
+
+    if ids is None:
+        for key in keys:
+            count += 1
+            total += key
+            mixed += mix_key(key)
+    else:
+        for key, identifier in zip(keys, ids, strict=True):
+            count += 1
+            total += key
+            mixed += mix_item(key, identifier)
+
+    return header_checksum(BucketChecksum(count, total, mixed))
+
+
+class LocationDataSnapshot:
+    """
+    This class provides read-only zero-copy access to on-disk location data snapshot.
+
+    Snapshot file consists of a header, containing magic bytes & checksum of packed keys
+    and ids it was built from, followed by sorted array of packed keys and array of corresponding ids.
+    Both arrays are native signed 64-bit integers and are exposed as `memoryview` over
+    memory-mapped file, so mapping a snapshot does not copy or parse it.
+    """
+
+    __slots__ = ("_file", "_mmap", "keys", "ids", "checksum")
+
+    def __init__(self, path: str):
+        """
+        Construct. Maps snapshot file into memory.
+
+        :param path: Snapshot file path
+        :raises ValueError: If file is not a valid snapshot
+        """
+
+        self._file = open(path, "rb")
+
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise
+
+        if len(self._mmap) < _HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a valid location data snapshot")
+
+        magic, count, total, mixed = _HEADER.unpack_from(self._mmap)
+
+        if magic != _MAGIC or len(self._mmap) != _HEADER.size + 2 * count * _ITEM_SIZE:
+            self.close()
+            raise ValueError(f"{path} is not a valid location data snapshot")
+
+        data = memoryview(self._mmap)[_HEADER.size:].cast("q")
+
+        self.keys = data[:count]
+        self.ids = data[count:]
+        self.checksum = BucketChecksum(count, total, mixed)
+
+    def __len__(self) -> int:
+        return self.checksum.count
+
+    def close(self):
+        """Releases memory views & unmaps snapshot file"""
+
+        for name in ("keys", "ids"):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+                setattr(self, name, None)
+
+        self._mmap.close()
+        self._file.close()
+
+    @staticmethod
+    def write(path: str, items: Iterable[Tuple[int, int]]):
+        """
+        Writes snapshot file atomically, see `app.utils.files.atomic_write`.
+
+        :param path: Snapshot file path
+        :param items: Iterable of (packed key, id) pairs, sorted by packed key
+        """
+
+        keys = array("q")
+        ids = array("q")
+
+        for key, identifier in items:
+            keys.append(key)
+            ids.append(identifier)
+
+        count, total, mixed = snapshot_checksum(keys, ids)
+
+        with atomic_write(path) as file:
+            file.write(_HEADER.pack(_MAGIC, count, total, mixed))
+            keys.tofile(file)
+            ids.tofile(file)
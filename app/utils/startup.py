@@ -0,0 +1,52 @@
+"""This module contains StartupReport class"""
+
+import time
+
+from contextlib import contextmanager
+from logging import Logger
+from typing import Dict
+
+
+class StartupReport:
+    """
+    This class measures duration of application startup stages,
+    e.g. heavy modules import, configuration parsing & DB pool connection,
+    so that cold start latency can be tracked.
+    """
+
+    def __init__(self):
+        """Construct without additional arguments. Startup is measured from construction"""
+
+        self._started = time.perf_counter()
+        self._stages: Dict[str, float] = {}
+
+    @property
+    def stages(self) -> Dict[str, float]:
+        """Mapping of stage name to its duration in seconds"""
+
+        return dict(self._stages)
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Measures duration of the code within context as startup stage.
+
+        :param name: Stage name
+        """
+
+        started = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self._stages[name] = time.perf_counter() - started
+
+    def log(self, logger: Logger):
+        """
+        Sends stages durations & total startup duration into logger.
+
+        :param logger: `Logger` instance
+        """
+
+        stages = ", ".join(f"{name} {duration:.3f}s" for name, duration in self._stages.items())
+        logger.info(f"Started in {time.perf_counter() - self._started:.3f}s ({stages})")
@@ -0,0 +1,7 @@
+-- Synchronization state: change feed cursor & full synchronization checkpoint.
+-- Declared by app/db/tables/sync_state.py.
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    name VARCHAR(64) PRIMARY KEY,
+    value VARCHAR
+);
@@ -0,0 +1,10 @@
+-- Expression index on location_data packed key, declared by app/db/tables/location_data.py
+-- as `location_data_packed_key`. Records, removed by change feed or full synchronization, are
+-- matched by packed key, so the expression must stay identical to the declared one.
+-- Index is built without blocking writes, so the script must not be run within a transaction.
+-- If the build fails, drop the INVALID index left behind before running the script again.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS location_data_packed_key ON location_data (
+    (CASE WHEN (eci IS NOT NULL) THEN CAST(eci AS BIGINT) + 4294967296
+          ELSE CAST(lac AS BIGINT) * 65536 + coalesce(cellid, 65535) END)
+);
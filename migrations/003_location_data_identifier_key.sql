@@ -0,0 +1,28 @@
+-- Unique index on location_data identifier, declared by app/db/tables/location_data.py
+-- as `location_data_identifier_key`. Insertion relies on it with ON CONFLICT DO NOTHING.
+-- NULLS NOT DISTINCT requires PostgreSQL 15+.
+-- Stop synchronization while the script runs: duplicates, inserted after they are removed,
+-- make the index build fail. The script must not be run within a transaction.
+-- If the build fails, drop the INVALID index left behind before running the script again.
+
+DO $$
+BEGIN
+    IF current_setting('server_version_num')::integer < 150000 THEN
+        RAISE EXCEPTION 'location_data_identifier_key requires PostgreSQL 15+ (NULLS NOT DISTINCT)';
+    END IF;
+END
+$$;
+
+-- Keep the earliest record of every identifier
+DELETE FROM location_data
+WHERE id IN (
+    SELECT id
+    FROM (
+        SELECT id, row_number() OVER (PARTITION BY lac, cellid, eci ORDER BY id) AS number
+        FROM location_data
+    ) AS numbered
+    WHERE number > 1
+);
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS location_data_identifier_key
+    ON location_data (lac, cellid, eci) NULLS NOT DISTINCT;
@@ -0,0 +1,105 @@
+"""Tests of location data API client timeouts, hedged requests & mirror failover"""
+
+import asyncio
+
+import pytest
+
+from app.api.client import LocationDataAPIClient
+
+
+class FakeLocationDataAPIClient(LocationDataAPIClient):
+    """Client, whose endpoints respond after prepared delays with prepared results or errors"""
+
+    def __init__(self, responses, hedge_after=None):
+        urls = list(responses)
+        super().__init__(url=urls[0], login="login", password="password", mirror_urls=urls[1:], hedge_after=hedge_after)
+        self._responses = responses
+        self.requested = []
+        self.cancelled = []
+
+    async def _get(self, url, session, params=None):
+        delay, result = self._responses[url]
+        self.requested.append(url)
+
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(url)
+            raise
+
+        if isinstance(result, Exception):
+            raise result
+
+        return result
+
+
+class FakeResponse:
+    """Response, returning prepared JSON"""
+
+    def __init__(self, data):
+        self._data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return None
+
+    async def json(self):
+        return self._data
+
+
+class FakeSession:
+    """Session, whose response headers arrive after prepared delay"""
+
+    def __init__(self, delay, data=None):
+        self._delay = delay
+        self._data = data
+
+    def get(self, url, auth=None, params=None):
+        return self._respond()
+
+    async def _respond(self):
+        await asyncio.sleep(self._delay)
+        return FakeResponse(self._data)
+
+
+def test_hedged_request_takes_the_first_response_and_cancels_the_others():
+    client = FakeLocationDataAPIClient(
+        {"http://primary": (1.0, ["primary"]), "http://mirror": (0.0, ["mirror"])},
+        hedge_after=0.01,
+    )
+
+    assert asyncio.run(client._get_hedged(session=None)) == ["mirror"]
+    assert client.requested == ["http://primary", "http://mirror"]
+    assert client.cancelled == ["http://primary"]
+    assert client.latency.source == "http://mirror"
+
+
+def test_mirror_is_requested_on_failure_only_without_hedge_delay():
+    client = FakeLocationDataAPIClient(
+        {"http://primary": (0.0, ConnectionError("primary")), "http://mirror": (0.0, ["mirror"])},
+    )
+
+    assert asyncio.run(client._get_hedged(session=None)) == ["mirror"]
+    assert client.requested == ["http://primary", "http://mirror"]
+    assert client.latency.samples == 2
+
+
+def test_first_error_is_raised_if_all_endpoints_failed():
+    client = FakeLocationDataAPIClient(
+        {"http://primary": (0.0, ConnectionError("primary")), "http://mirror": (0.0, ConnectionError("mirror"))},
+        hedge_after=0.01,
+    )
+
+    with pytest.raises(ConnectionError, match="primary"):
+        asyncio.run(client._get_hedged(session=None))
+
+
+def test_response_headers_are_limited_by_first_byte_timeout():
+    client = LocationDataAPIClient(url="http://primary", login="login", password="password", first_byte_timeout=0.01)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(client._get(url="http://primary", session=FakeSession(delay=1.0)))
+
+    assert asyncio.run(client._get(url="http://primary", session=FakeSession(delay=0.0, data=[1]))) == [1]
@@ -0,0 +1,50 @@
+"""Tests of LocationDataAPIService validation"""
+
+import asyncio
+
+from app.api.response import LocationDataResponse, LocationDataChangesResponse
+from app.services.api.location_data import LocationDataAPIService
+
+
+class FakeAPIClient:
+    """API client, returning prepared responses"""
+
+    latency = None
+
+    def __init__(self, location_data=(), added=(), removed=()):
+        self._location_data = list(location_data)
+        self._changes = LocationDataChangesResponse(added=list(added), removed=list(removed), cursor="next")
+
+    async def get(self):
+        return self._location_data
+
+    async def get_changes(self, cursor):
+        return self._changes
+
+
+def _identifiers(location_data):
+    return [(data.lac, data.cellid, data.eci) for data in location_data]
+
+
+def test_get_changes_drops_identifiers_added_and_removed_within_one_response():
+    client = FakeAPIClient(
+        added=[LocationDataResponse(1, 2, None), LocationDataResponse(3, None, None)],
+        removed=[LocationDataResponse(1, 2, None), LocationDataResponse(None, None, 7)],
+    )
+
+    added, removed, cursor = asyncio.run(LocationDataAPIService(client).get_changes("previous"))
+
+    assert _identifiers(added) == [(3, None, None)]
+    assert _identifiers(removed) == [(None, None, 7)]
+    assert cursor == "next"
+
+
+def test_get_changes_matches_overlap_after_validation():
+    client = FakeAPIClient(
+        added=[LocationDataResponse("1", 2.0, None)],
+        removed=[LocationDataResponse(1, 2, None)],
+    )
+
+    added, removed, _ = asyncio.run(LocationDataAPIService(client).get_changes("previous"))
+
+    assert added == [] and removed == []
@@ -0,0 +1,62 @@
+"""Tests of columnar LocationDataBatch, batch diff & key range bounds"""
+
+from app.core.batch import LocationDataBatch
+from app.core.reconciliation import diff_batches, key_range_bounds
+from app.utils.keys import pack_key
+
+
+def _batch(*rows):
+    """Batch of (id, lac, cellid, eci) rows"""
+
+    return LocationDataBatch.from_columns(*zip(*rows)) if rows else LocationDataBatch()
+
+
+def test_from_columns_keeps_nulls_and_treats_missing_columns_as_empty():
+    batch = LocationDataBatch.from_columns([1, None], [10, None], [None, None], [None, 7])
+
+    assert list(batch.rows()) == [(1, 10, None, None), (None, None, None, 7)]
+    assert batch.id_nulls == bytearray([0, 1])
+    assert list(batch.packed_keys()) == [pack_key(10, None, None), pack_key(None, None, 7)]
+
+    assert len(LocationDataBatch.from_columns(None, None, None, None)) == 0
+
+
+def test_take_and_slice_keep_row_values_and_nulls():
+    batch = _batch((1, 10, 1, None), (2, 20, None, None), (3, None, None, 30))
+
+    assert list(batch.take([2, 0]).rows()) == [(3, None, None, 30), (1, 10, 1, None)]
+    assert list(batch.take([]).rows()) == []
+    assert list(batch.slice(1, 3).rows()) == [(2, 20, None, None), (3, None, None, 30)]
+    assert batch.slice(1, 3).cellid_nulls == bytearray([1, 1])
+
+
+def test_diff_batches_compares_packed_keys_and_skips_duplicates():
+    actual = _batch((None, 10, 1, None), (None, 20, None, None), (None, 20, None, None), (None, None, None, 30))
+    existing = _batch((1, 10, 1, None), (2, 10, None, None), (3, None, None, 30))
+
+    to_insert, to_delete = diff_batches(actual, existing)
+
+    assert list(to_insert.rows()) == [(None, 20, None, None)]
+    assert list(to_delete.rows()) == [(2, 10, None, None)]
+
+
+def test_key_range_bounds_split_keys_into_ranges_of_similar_size():
+    keys = list(range(10_000, 0, -1))
+
+    bounds = key_range_bounds(keys, 4)
+
+    assert bounds == sorted(set(bounds)) and len(bounds) == 3
+
+    sizes = [
+        sum(1 for key in keys if (start is None or key >= start) and (stop is None or key < stop))
+        for start, stop in zip([None, *bounds], [*bounds, None])
+    ]
+
+    assert sum(sizes) == len(keys)
+    assert max(sizes) - min(sizes) < len(keys) // 20
+
+
+def test_key_range_bounds_skip_splitting_of_duplicate_keys():
+    assert key_range_bounds([], 4) == []
+    assert key_range_bounds([1, 2, 3], 1) == []
+    assert key_range_bounds([5] * 100, 4) == []
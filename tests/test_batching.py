@@ -0,0 +1,57 @@
+"""Tests of adaptive batch sizing"""
+
+import pytest
+
+from app.utils.batching import AdaptiveBatcher
+
+
+def test_observe_moves_batch_size_toward_target_duration_at_most_twice():
+    batcher = AdaptiveBatcher(target_duration=1.0, initial_size=1000, min_size=100, max_size=100_000)
+
+    # 10000 rows per second would fit 10000 rows into target duration, but size only doubles
+    batcher.observe("insert", rows=1000, duration=0.1)
+    assert batcher.size("insert") == 2000
+
+    # 1000 rows per second halves the size at most
+    batcher.observe("insert", rows=2000, duration=2.0)
+    assert batcher.size("insert") == 1000
+
+    batcher.observe("insert", rows=1000, duration=1.25)
+    assert batcher.size("insert") == 800
+
+    assert batcher.size("delete") == 1000
+
+
+def test_observe_ignores_small_tail_batches_and_keeps_size_limits():
+    batcher = AdaptiveBatcher(target_duration=1.0, initial_size=1000, min_size=800, max_size=1500)
+
+    batcher.observe("insert", rows=100, duration=10.0)
+    assert batcher.size("insert") == 1000
+
+    batcher.observe("insert", rows=1000, duration=0.001)
+    assert batcher.size("insert") == 1500
+
+    batcher.observe("insert", rows=1500, duration=100.0)
+    assert batcher.size("insert") == 800
+
+
+def test_report_sums_observed_rows_and_durations_until_reset():
+    batcher = AdaptiveBatcher(target_duration=1.0, initial_size=1000, min_size=100, max_size=10_000)
+
+    batcher.observe("delete", rows=1000, duration=0.5)
+    batcher.observe("delete", rows=500, duration=0.5)
+
+    [stats] = batcher.report()
+
+    assert (stats.operation, stats.sizes, stats.rows) == ("delete", [1000, 500], 1500)
+    assert stats.rows_per_second == pytest.approx(1500)
+
+    batcher.reset()
+
+    assert batcher.report() == []
+    assert batcher.size("delete") == 2000
+
+
+def test_batch_sizes_must_be_ordered():
+    with pytest.raises(ValueError):
+        AdaptiveBatcher(initial_size=100, min_size=1000)
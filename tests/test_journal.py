@@ -0,0 +1,129 @@
+"""Tests of sync plan journal & checkpointed synchronization"""
+
+import asyncio
+
+from app.core.batch import LocationDataBatch
+from app.core.journal import SyncJournal
+from app.services.db.location_data import LocationDataDBService, _CHECKPOINT_STATE_NAME
+from app.utils.keys import BucketChecksum
+
+
+class FakeSession:
+    """Session & transaction, that does nothing"""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return None
+
+
+class FakeSessionMaker:
+    """Session maker of fake sessions"""
+
+    def __call__(self):
+        return FakeSession()
+
+    def begin(self):
+        return FakeSession()
+
+
+class FakeDBRepository:
+    """Repository, recording written batches"""
+
+    def __init__(self):
+        self.inserted = []
+        self.deleted = []
+
+    async def insert_batch(self, batch, session, mode="rows"):
+        self.inserted.extend(batch.rows())
+        return batch
+
+    async def delete_batch(self, batch, session, mode="rows"):
+        self.deleted.extend(batch.rows())
+        return batch
+
+
+class FakeStateDBRepository:
+    """State repository, backed by dict"""
+
+    def __init__(self, state):
+        self.state = dict(state)
+
+    async def get(self, name, session):
+        return self.state.get(name)
+
+    async def set(self, name, value, session):
+        self.state[name] = value
+
+
+def _batch(*rows):
+    """Batch of (id, lac, cellid, eci) rows"""
+
+    return LocationDataBatch.from_columns(*zip(*rows)) if rows else LocationDataBatch()
+
+
+def test_journal_keeps_plan_of_the_same_fingerprint_only(tmp_path):
+    journal = SyncJournal(str(tmp_path / "journal"))
+    fingerprint = BucketChecksum(2, 30, 40)
+    to_insert = _batch((None, 10, 1, None), (None, None, None, 20))
+    to_delete = _batch((5, 30, None, None), (None, 40, 4, None))
+
+    plan = journal.write(fingerprint, to_insert, to_delete)
+    resumed = journal.load(fingerprint)
+
+    assert resumed is not None and resumed.resumed
+    assert resumed.plan_id == plan.plan_id and resumed.fingerprint == fingerprint
+    assert list(resumed.to_insert.rows()) == list(to_insert.rows())
+    assert list(resumed.to_delete.rows()) == list(to_delete.rows())
+
+    assert journal.load(BucketChecksum(2, 30, 41)) is None
+    # Outdated journal is removed
+    assert journal.load(fingerprint) is None
+
+
+def test_invalid_journal_is_discarded(tmp_path):
+    path = tmp_path / "journal"
+    path.write_bytes(b"LDJRNL01 truncated")
+    journal = SyncJournal(str(path))
+
+    assert journal.load(BucketChecksum(0, 0, 0)) is None
+    assert not path.exists()
+
+
+def test_checkpointed_sync_skips_committed_changes_of_the_same_plan():
+    to_insert = _batch(*((None, lac, None, None) for lac in range(1, 5)))
+    to_delete = _batch((5, 50, None, None), (6, 60, None, None))
+    db_repository = FakeDBRepository()
+    state_repository = FakeStateDBRepository({_CHECKPOINT_STATE_NAME: "plan:3"})
+    db_service = LocationDataDBService(
+        db_repository=db_repository,
+        session=FakeSessionMaker(),
+        state_repository=state_repository,
+        checkpoint_size=2,
+    )
+
+    inserted, deleted = asyncio.run(db_service.sync_db_batch(to_insert, to_delete, checkpoint="plan"))
+
+    assert db_repository.inserted == [(None, 4, None, None)]
+    assert db_repository.deleted == list(to_delete.rows())
+    assert list(inserted.rows()) == [(None, 4, None, None)] and len(deleted) == 2
+    assert state_repository.state[_CHECKPOINT_STATE_NAME] == "plan:6"
+
+
+def test_checkpoint_of_another_plan_is_ignored():
+    db_repository = FakeDBRepository()
+    state_repository = FakeStateDBRepository({_CHECKPOINT_STATE_NAME: "other:3"})
+    db_service = LocationDataDBService(
+        db_repository=db_repository,
+        session=FakeSessionMaker(),
+        state_repository=state_repository,
+        checkpoint_size=2,
+    )
+
+    to_insert = _batch(*((None, lac, None, None) for lac in range(1, 4)))
+
+    asyncio.run(db_service.sync_db_batch(to_insert, LocationDataBatch(), checkpoint="plan"))
+
+    assert len(db_repository.inserted) == 3
+    assert state_repository.state[_CHECKPOINT_STATE_NAME] == "plan:3"
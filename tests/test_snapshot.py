@@ -0,0 +1,115 @@
+"""Tests of snapshot reconciliation: snapshot diff & merge of committed changes"""
+
+import asyncio
+
+from app.core.batch import LocationDataBatch
+from app.core.reconciliation import SnapshotReconciliation
+from app.utils.keys import pack_key
+from app.utils.snapshot import LocationDataSnapshot, snapshot_checksum
+
+
+class FakeAPIService:
+    """API service, returning prepared actual location data"""
+
+    def __init__(self, actual: LocationDataBatch):
+        self.actual = actual
+
+    async def get_batch(self):
+        return self.actual
+
+
+class FakeDBService:
+    """DB service, backed by in-memory location data table"""
+
+    def __init__(self, existing: LocationDataBatch):
+        self.existing = existing
+        self.reads = 0
+
+    async def get_snapshot_checksum(self):
+        return snapshot_checksum(self.existing.packed_keys(), self.existing.ids)
+
+    async def get_batch(self):
+        self.reads += 1
+        return self.existing
+
+
+def _batch(*rows):
+    """Batch of (id, lac, cellid, eci) rows"""
+
+    return LocationDataBatch.from_columns(*zip(*rows)) if rows else LocationDataBatch()
+
+
+def _identifiers(batch):
+    """Sorted (lac, cellid, eci) identifiers of batch"""
+
+    return sorted((lac, cellid, eci) for _id, lac, cellid, eci in batch.rows())
+
+
+def test_diff_compares_actual_data_with_snapshot_and_committed_merges_changes(tmp_path):
+    path = str(tmp_path / "snapshot")
+    existing = _batch((1, 10, 1, None), (2, 20, None, None), (3, None, None, 30))
+    api_service = FakeAPIService(_batch((None, 10, 1, None), (None, None, None, 30), (None, None, None, 40)))
+    db_service = FakeDBService(existing)
+    strategy = SnapshotReconciliation(path)
+
+    async def sync():
+        to_insert, to_delete = await strategy.diff(api_service, db_service)
+        inserted = to_insert.slice(0, len(to_insert))
+        inserted.ids[0], inserted.id_nulls[0] = 4, 0
+        await strategy.committed(inserted, to_delete)
+
+        return to_insert, to_delete, await strategy.diff(api_service, db_service)
+
+    to_insert, to_delete, (next_insert, next_delete) = asyncio.run(sync())
+
+    assert _identifiers(to_insert) == [(None, None, 40)]
+    assert list(to_delete.rows()) == [(2, 20, None, None)]
+    assert len(next_insert) == 0 and len(next_delete) == 0
+    assert db_service.reads == 1
+
+    snapshot = LocationDataSnapshot(path)
+
+    try:
+        assert list(snapshot.keys) == sorted(snapshot.keys)
+        assert dict(zip(snapshot.keys, snapshot.ids)) == {
+            pack_key(10, 1, None): 1,
+            pack_key(None, None, 30): 3,
+            pack_key(None, None, 40): 4,
+        }
+    finally:
+        snapshot.close()
+
+
+def test_snapshot_matching_table_checksum_is_used_without_reading_table(tmp_path):
+    path = str(tmp_path / "snapshot")
+    existing = _batch((1, 10, 1, None), (2, None, None, 30))
+    LocationDataSnapshot.write(path, sorted(zip(existing.packed_keys(), existing.ids)))
+    db_service = FakeDBService(existing)
+
+    to_insert, to_delete = asyncio.run(
+        SnapshotReconciliation(path).diff(FakeAPIService(_batch((None, 10, 1, None))), db_service)
+    )
+
+    assert len(to_insert) == 0
+    assert list(to_delete.rows()) == [(2, None, None, 30)]
+    assert db_service.reads == 0
+
+
+def test_snapshot_is_reloaded_after_commit_of_unexpected_changes(tmp_path):
+    path = str(tmp_path / "snapshot")
+    db_service = FakeDBService(_batch((1, 10, 1, None)))
+    api_service = FakeAPIService(_batch((None, 10, 1, None), (None, 20, None, None)))
+    strategy = SnapshotReconciliation(path)
+
+    async def sync():
+        await strategy.diff(api_service, db_service)
+        # Row has been inserted by someone else, so nothing is inserted by this cycle
+        db_service.existing = _batch((1, 10, 1, None), (5, 20, None, None))
+        await strategy.committed(LocationDataBatch(), LocationDataBatch())
+
+        return await strategy.diff(api_service, db_service)
+
+    to_insert, to_delete = asyncio.run(sync())
+
+    assert len(to_insert) == 0 and len(to_delete) == 0
+    assert db_service.reads == 2
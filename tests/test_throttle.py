@@ -0,0 +1,25 @@
+"""Tests of paced write mode budgets"""
+
+import pytest
+
+from app.services.db.throttle import WriteThrottle
+
+
+def test_delay_keeps_the_tightest_budget_and_subtracts_chunk_duration():
+    throttle = WriteThrottle(chunk_size=1000, rows_per_second=500, wal_bytes_per_second=1000)
+
+    assert throttle.delay(rows=1000, wal_bytes=1000, elapsed=0.5) == pytest.approx(1.5)
+    assert throttle.delay(rows=100, wal_bytes=4000, elapsed=1.0) == pytest.approx(3.0)
+    assert throttle.delay(rows=1000, wal_bytes=0, elapsed=5.0) == 0.0
+
+
+def test_delay_without_budgets_is_zero():
+    throttle = WriteThrottle(chunk_size=1000)
+
+    assert not throttle.measures_wal
+    assert throttle.delay(rows=1_000_000, wal_bytes=1 << 30, elapsed=0.0) == 0.0
+
+
+def test_chunk_size_must_be_positive():
+    with pytest.raises(ValueError):
+        WriteThrottle(chunk_size=0)